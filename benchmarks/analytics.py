@@ -0,0 +1,59 @@
+"""Benchmark fipiran.analytics on the recorded symbol_history.json fixture.
+
+Run with ``python -m benchmarks.analytics`` from the repository root.
+"""
+
+from pathlib import Path
+from timeit import timeit
+
+import polars as pl
+
+from fipiran.analytics import (
+    drawdown,
+    ema,
+    log_returns,
+    moving_average,
+    resample,
+    rolling_volatility,
+    rsi,
+)
+from fipiran.symbols import _History, adjust_history
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def load_history() -> pl.LazyFrame:
+    m = _History.model_validate_json(
+        (TESTDATA / 'symbol_history.json').read_bytes()
+    )
+    return pl.LazyFrame((vars(i) for i in m.items), infer_schema_length=None)
+
+
+def main(symbols: int = 500):
+    one = load_history().collect()
+    # emulate a market-wide frame by repeating the symbol with new insCodes
+    many = pl.concat(
+        [one.with_columns(insCode=pl.lit(str(i))) for i in range(symbols)]
+    ).lazy()
+    rows = many.select(pl.len()).collect().item()
+
+    def indicators():
+        adjust_history(many).with_columns(
+            log_returns(),
+            moving_average(20),
+            rolling_volatility(20),
+            ema(12),
+            rsi(),
+            drawdown(),
+        ).collect()
+
+    def weekly():
+        resample(adjust_history(many), '1w').collect()
+
+    for f in (indicators, weekly):
+        seconds = timeit(f, number=3) / 3
+        print(f'{f.__name__}: {rows} rows in {seconds:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
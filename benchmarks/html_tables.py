@@ -0,0 +1,36 @@
+"""Benchmark fipiran._html.html_tables against the lxml.html tree approach.
+
+Run with ``python -m benchmarks.html_tables`` from the repository root.
+"""
+
+from pathlib import Path
+from timeit import timeit
+
+from lxml.html import fromstring
+
+from fipiran import _YK
+from fipiran._html import html_tables
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def tree_tables(content: bytes) -> list[list[list[str]]]:
+    return [
+        [
+            [cell.text_content().strip() for cell in tr]
+            for tr in table.iter('tr')
+        ]
+        for table in fromstring(content.decode().translate(_YK)).iter('table')
+    ]
+
+
+def main(number: int = 20):
+    for name in ('financial_ratios.html', 'profit_growth.html'):
+        content = (TESTDATA / name).read_bytes()
+        for f in (tree_tables, html_tables):
+            seconds = timeit(lambda: f(content), number=number) / number
+            print(f'{name} {f.__name__}: {seconds * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
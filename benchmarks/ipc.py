@@ -0,0 +1,48 @@
+"""Benchmark passing frames to a process pool by value or by FrameHandle.
+
+Run with ``python -m benchmarks.ipc`` from the repository root.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter
+
+import polars as pl
+
+from benchmarks.analytics import load_history
+from fipiran.ipc import FrameHandle, share
+
+
+def closing_mean(df: pl.DataFrame) -> float:
+    return df.select(pl.col('closingPrice').mean()).item()
+
+
+def handle_closing_mean(handle: FrameHandle) -> float:
+    return closing_mean(handle.read())
+
+
+def main(symbols: int = 200, processes: int = 4):
+    one = load_history().collect()
+    frames = [one.with_columns(insCode=pl.lit(str(i))) for i in range(symbols)]
+    with ProcessPoolExecutor(
+        processes, mp_context=get_context('spawn')
+    ) as executor:
+        _ = [*executor.map(closing_mean, frames[:processes])]  # warm up
+
+        start = perf_counter()
+        _ = [*executor.map(closing_mean, frames)]
+        print(f'frames: {symbols} symbols in {perf_counter() - start:.3f}s')
+
+        start = perf_counter()
+        handles = [share(df) for df in frames]
+        _ = [*executor.map(handle_closing_mean, handles)]
+        print(
+            f'handles: {symbols} symbols in {perf_counter() - start:.3f}s'
+            ' (including share)'
+        )
+        for h in handles:
+            h.unlink()
+
+
+if __name__ == '__main__':
+    main()
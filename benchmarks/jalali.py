@@ -0,0 +1,30 @@
+"""Benchmark fipiran.jalali against per-row jdatetime conversion.
+
+Run with ``python -m benchmarks.jalali`` from the repository root.
+"""
+
+from datetime import date
+from timeit import timeit
+
+import polars as pl
+from jdatetime import date as jdate
+
+from fipiran.jalali import date_parts
+
+
+def main(rows: int = 5_000_000):
+    dates = pl.date_range(date(1990, 1, 1), date(2040, 12, 31), eager=True)
+    df = pl.DataFrame({'d': dates.sample(rows, with_replacement=True)})
+
+    seconds = timeit(lambda: df.select(date_parts(pl.col('d'))), number=3) / 3
+    print(f'fipiran.jalali: {rows} rows in {seconds:.3f}s')
+
+    sample = df['d'].head(100_000).to_list()
+    seconds = timeit(
+        lambda: [jdate.fromgregorian(date=d) for d in sample], number=1
+    )
+    print(f'jdatetime: {len(sample)} rows in {seconds:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
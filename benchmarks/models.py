@@ -0,0 +1,33 @@
+"""Benchmark per-row validation cost of the _LooseModel response models.
+
+Run with ``python -m benchmarks.models`` from the repository root.
+"""
+
+from json import loads
+from pathlib import Path
+from timeit import timeit
+
+from fipiran.funds import FundInfo, _Funds
+from fipiran.symbols import HistoryItem, _History
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def main(number: int = 10):
+    for model, item, file in (
+        (_History, HistoryItem, 'symbol_history.json'),
+        (_Funds, FundInfo, 'fundcompare.json'),
+    ):
+        data = (TESTDATA / file).read_bytes()
+        rows = loads(data)['items']
+        n = len(rows)
+        seconds = timeit(
+            lambda: model.model_validate_json(data), number=number
+        )
+        print(f'{file} validate_json: {seconds / number / n * 1e6:.2f}µs/row')
+        seconds = timeit(lambda: [item(**r) for r in rows], number=number)
+        print(f'{file} __init__: {seconds / number / n * 1e6:.2f}µs/row')
+
+
+if __name__ == '__main__':
+    main()
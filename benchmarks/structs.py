@@ -0,0 +1,52 @@
+"""Benchmark fipiran.structs against the pydantic response models.
+
+Run with ``python -m benchmarks.structs`` from the repository root.
+"""
+
+import tracemalloc
+from pathlib import Path
+from timeit import timeit
+
+from fipiran.funds import _Funds
+from fipiran.structs import validate_json
+from fipiran.symbols import _History, _InstrumentInfo
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def measure(name: str, parse, data: bytes, count) -> None:
+    parse(data)  # warm up validators
+    tracemalloc.start()
+    result = parse(data)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    n = count(result)
+    seconds = timeit(lambda: parse(data), number=10) / 10
+    print(
+        f'{name}: {size / n:.0f} bytes and {seconds / n * 1e6:.2f}µs'
+        f' per object ({n} objects)'
+    )
+
+
+def main():
+    for model, file, items in (
+        (_History, 'symbol_history.json', 'items'),
+        (_Funds, 'fundcompare.json', 'items'),
+        (_InstrumentInfo, 'symbol_info.json', 'item'),
+    ):
+        data = (TESTDATA / file).read_bytes()
+
+        def count(m):
+            return len(getattr(m, items))
+
+        measure(f'{file} pydantic', model.model_validate_json, data, count)
+        measure(
+            f'{file} structs',
+            lambda d: validate_json(model, d),
+            data,
+            count,
+        )
+
+
+if __name__ == '__main__':
+    main()
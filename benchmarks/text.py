@@ -0,0 +1,41 @@
+"""Benchmark fipiran.text.normalize on a search() sized snapshot.
+
+Run with ``python -m benchmarks.text`` from the repository root.
+"""
+
+from json import dumps, loads
+from pathlib import Path
+from timeit import timeit
+
+import polars as pl
+
+from fipiran.symbols import _Search
+from fipiran.text import normalize_strings
+
+TESTDATA = Path(__file__).parent.parent / 'tests' / 'testdata'
+
+
+def main(rows: int = 5_000):
+    data = loads((TESTDATA / 'shcarbon_search.json').read_bytes())
+    # emulate the full market snapshot by repeating the recorded items
+    for key, items in data['items'][0].items():
+        data['items'][0][key] = items * (rows // len(items))
+    content = dumps(data)
+
+    def parse() -> pl.DataFrame:
+        r = _Search.model_validate_json(content).items[0]
+        return pl.LazyFrame(
+            (vars(i) for i in r.instruments), infer_schema_length=None
+        ).collect()
+
+    df = parse()
+    seconds = timeit(parse, number=3) / 3
+    print(f'search() parsing: {df.height} rows in {seconds * 1000:.2f}ms')
+    seconds = (
+        timeit(lambda: normalize_strings(df.lazy()).collect(), number=10) / 10
+    )
+    print(f'normalize_strings: {df.height} rows in {seconds * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,34 @@
 __version__ = '4.0.1.dev1'
 
+from asyncio import Semaphore as _Semaphore, gather as _agather
+from collections.abc import Awaitable as _Awaitable, Iterable as _Iterable
+from hashlib import sha1 as _sha1
+from inspect import get_annotations as _get_annotations
 from json import loads as _jl
+from pathlib import Path as _Path
+from time import time as _time
 from typing import Any as _Any
 
 from aiohutils.session import SessionManager
-from pydantic import BaseModel as _BaseModel
+from pydantic import BaseModel as _BaseModel, Field as _Field
+
+from fipiran.structs import validate_json as _validate_struct
 
 
 class _LooseModel(_BaseModel, extra='allow'):
-    def __init__(self, **data):
-        for field_name in type(self).model_fields:
-            if field_name not in data:
-                data[field_name] = None
-        super().__init__(**data)
+    """A model whose fields default to None.
+
+    The defaults are set once per class, before pydantic collects the
+    fields, so both __init__ and model_validate_json fill missing fields
+    in the validator itself. The None default is validated, so a missing
+    field that is not optional still raises ValidationError.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in _get_annotations(cls):
+            if name not in vars(cls):
+                setattr(cls, name, _Field(None, validate_default=True))
 
 
 _FIPIRAN = 'https://www.fipiran.com/'
@@ -28,16 +44,64 @@ session_manager = SessionManager(
 )
 
 
+_api_base = _API
+
+
+def use_proxy(url: str | None) -> None:
+    """Send API requests to a fipiran.proxy service running at url.
+
+    Pass None to send them to fipiran.com again.
+    """
+    global _api_base
+    _api_base = _API if url is None else f'{url.rstrip("/")}/services/'
+
+
+_cache_dir: _Path | None = None
+_cache_ttl = 0.0
+
+
+def set_cache(directory: _Path | str | None, *, ttl: float = 86400.0):
+    """Cache raw responses in directory and reuse them for ttl seconds.
+
+    Pass None to disable the cache.
+    """
+    global _cache_dir, _cache_ttl
+    if directory is not None:
+        directory = _Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+    _cache_dir, _cache_ttl = directory, ttl
+
+
 async def _read(url, method: str = 'get', **kwargs) -> bytes:
+    if _cache_dir is None:
+        r = await session_manager.request(method, url, **kwargs)
+        return await r.read()
+    key = repr((method, url, sorted(kwargs.items())))
+    path = _cache_dir / _sha1(key.encode()).hexdigest()
+    try:
+        if _time() - path.stat().st_mtime < _cache_ttl:
+            return path.read_bytes()
+    except FileNotFoundError:
+        pass
     r = await session_manager.request(method, url, **kwargs)
-    return await r.read()
+    content = await r.read()
+    tmp = path.with_suffix('.tmp')
+    tmp.write_bytes(content)
+    tmp.replace(path)
+    return content
 
 
 async def _api[T: _BaseModel](path, *, model: type[T], **kwargs) -> T:
-    r = await _read(_API + path, **kwargs)
+    r = await _read(_api_base + path, **kwargs)
     return model.model_validate_json(r)
 
 
+async def _api_struct(path, *, model: type[_BaseModel], **kwargs) -> _Any:
+    """Like _api, but return an instance of structs.struct_type(model)."""
+    r = await _read(_api_base + path, **kwargs)
+    return _validate_struct(model, r)
+
+
 async def _fipiran(path: str, params=None, json_resp=False) -> _Any:
     text = (
         (await _read(f'{_FIPIRAN}{path}', params=params))
@@ -47,3 +111,14 @@ async def _fipiran(path: str, params=None, json_resp=False) -> _Any:
     if json_resp is True:
         return _jl(text)
     return text
+
+
+async def _gather[T](aws: _Iterable[_Awaitable[T]], limit: int) -> list[T]:
+    """Await all of aws, running at most limit of them concurrently."""
+    semaphore = _Semaphore(limit)
+
+    async def limited(aw: _Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await _agather(*[limited(aw) for aw in aws])
@@ -0,0 +1,130 @@
+"""Export fipiran data to files, e.g.
+
+    python -m fipiran funds instruments -o data
+    python -m fipiran history -f ndjson -j 16 --rate-limit 10 --incremental
+    python -m fipiran navps --items 11215 11216 --partition-by regNo
+
+Run ``python -m fipiran -h`` for all options.
+"""
+
+from argparse import ArgumentParser
+from asyncio import run
+from sys import stderr
+
+from fipiran import session_manager, set_cache
+from fipiran.export import PER_ITEM, SNAPSHOTS, export_items, export_snapshot
+
+
+def parse_args(args=None):
+    parser = ArgumentParser(
+        prog='python -m fipiran',
+        description='Export fipiran endpoints to Parquet, CSV or NDJSON.',
+    )
+    parser.add_argument(
+        'datasets',
+        nargs='+',
+        choices=[*SNAPSHOTS, *PER_ITEM],
+        metavar='dataset',
+        help=f'one or more of: {", ".join([*SNAPSHOTS, *PER_ITEM])}',
+    )
+    parser.add_argument('-o', '--output', default='.', help='output directory')
+    parser.add_argument(
+        '-f',
+        '--format',
+        choices=('parquet', 'csv', 'ndjson'),
+        default='parquet',
+    )
+    parser.add_argument(
+        '--items',
+        nargs='+',
+        help='insCodes or regNos of per-item datasets (default: all)',
+    )
+    parser.add_argument(
+        '-j',
+        '--concurrency',
+        type=int,
+        default=8,
+        help='maximum number of concurrent requests',
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        help='maximum number of requests started per second',
+    )
+    parser.add_argument(
+        '--cache-dir', help='directory for caching raw responses'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=86400.0,
+        help='seconds for which cached responses are reused',
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='only fetch and merge rows newer than existing item files',
+    )
+    parser.add_argument(
+        '--partition-by',
+        nargs='+',
+        default=[],
+        metavar='COLUMN',
+        help='write hive-style {column}={value} subdirectories',
+    )
+    parser.add_argument(
+        '--normalize',
+        action='store_true',
+        help='normalize Persian text, see fipiran.text',
+    )
+    return parser.parse_args(args)
+
+
+async def main(args=None) -> int:
+    """Run the export and return the exit status.
+
+    The status is 1 if some items of per-item datasets failed; the other
+    items and datasets are still exported.
+    """
+    ns = parse_args(args)
+    status = 0
+    if ns.cache_dir is not None:
+        set_cache(ns.cache_dir, ttl=ns.cache_ttl)
+    try:
+        for dataset in ns.datasets:
+            if dataset in SNAPSHOTS:
+                await export_snapshot(
+                    dataset,
+                    ns.output,
+                    format=ns.format,
+                    partition_by=ns.partition_by,
+                    normalize=ns.normalize,
+                )
+                print(dataset)
+                continue
+            try:
+                n = await export_items(
+                    dataset,
+                    ns.output,
+                    ns.items,
+                    format=ns.format,
+                    concurrency=ns.concurrency,
+                    rate_limit=ns.rate_limit,
+                    incremental=ns.incremental,
+                    partition_by=ns.partition_by,
+                    normalize=ns.normalize,
+                )
+            except ExceptionGroup as eg:
+                status = 1
+                print(f'{dataset}: {eg.message}', file=stderr)
+                for e in eg.exceptions:
+                    print(f'  {e.__notes__[-1]}: {e!r}', file=stderr)
+                continue
+            print(f'{dataset}: {n} items')
+    finally:
+        await session_manager.aclose()
+    return status
+
+
+if __name__ == '__main__':
+    raise SystemExit(run(main()))
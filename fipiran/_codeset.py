@@ -0,0 +1,119 @@
+"""The base class of symbols.SymbolSet and funds.FundSet."""
+
+from __future__ import annotations as _
+
+from abc import ABC as _ABC, abstractmethod as _abstractmethod
+from collections.abc import Iterable as _Iterable
+from typing import Any as _Any, Self as _Self
+
+import numpy as _np
+import polars as _pl
+
+from fipiran import _gather
+
+
+class CodeSet(_ABC):
+    """An immutable set of codes stored as a sorted Int64 Series.
+
+    Subclasses set _column to the name of the code column in returned
+    frames (where codes are strings) and define _item to create the handle
+    object of a code. codes may be items (e.g. Symbol), str or int.
+    """
+
+    __slots__ = ('codes',)
+    _column: str
+
+    def __init__(self, codes: _Iterable[_Any] | _pl.Series = ()):
+        if not isinstance(codes, _pl.Series):
+            codes = _pl.Series([self._code(c) for c in codes], dtype=_pl.Int64)
+        self.codes = (
+            codes.cast(_pl.Int64)
+            .drop_nulls()
+            .unique()
+            .sort()
+            .rename(self._column)
+        )
+
+    @classmethod
+    def _from_array(cls, array: _np.ndarray) -> _Self:
+        # array is known to be sorted and unique
+        new = object.__new__(cls)
+        new.codes = _pl.Series(cls._column, array, dtype=_pl.Int64)
+        return new
+
+    @classmethod
+    def from_frame(cls, lf: _pl.LazyFrame | _pl.DataFrame, /) -> _Self:
+        """Return the set of codes in the code column of lf."""
+        return cls(lf.lazy().select(cls._column).collect().to_series())
+
+    def __repr__(self):
+        return f'<{type(self).__name__} of {len(self)} codes>'
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self._item, self.codes)
+
+    @_abstractmethod
+    def _item(self, code: int) -> _Any: ...
+
+    def _code(self, item) -> int:
+        return int(item)
+
+    def __contains__(self, item) -> bool:
+        try:
+            code = self._code(item)
+        except (TypeError, ValueError):
+            return False
+        i = self.codes.search_sorted(code)
+        return i < len(self.codes) and self.codes[i] == code
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.codes.equals(self.codes)
+
+    def __hash__(self):
+        return hash(self.codes.to_numpy().tobytes())
+
+    def _array(self) -> _np.ndarray:
+        return self.codes.to_numpy()
+
+    def __or__(self, other: _Self) -> _Self:
+        return self._from_array(_np.union1d(self._array(), other._array()))
+
+    def __and__(self, other: _Self) -> _Self:
+        return self._from_array(
+            _np.intersect1d(self._array(), other._array(), assume_unique=True)
+        )
+
+    def __sub__(self, other: _Self) -> _Self:
+        return self._from_array(
+            _np.setdiff1d(self._array(), other._array(), assume_unique=True)
+        )
+
+    def __xor__(self, other: _Self) -> _Self:
+        return self._from_array(
+            _np.setxor1d(self._array(), other._array(), assume_unique=True)
+        )
+
+    def frame(self) -> _pl.LazyFrame:
+        """Return the codes as a string column, like in returned frames."""
+        return self.codes.cast(_pl.String).to_frame().lazy()
+
+    def filter(self, lf: _pl.LazyFrame, /) -> _pl.LazyFrame:
+        """Return the rows of lf whose code is in this set."""
+        return lf.join(
+            self.frame(),
+            left_on=_pl.col(self._column).cast(_pl.String),
+            right_on=self._column,
+            how='semi',
+        )
+
+    async def gather(
+        self, method: str, /, *args, concurrency: int = 8, **kwargs
+    ) -> list:
+        """Call an async method of every item and return the results."""
+        return await _gather(
+            (getattr(item, method)(*args, **kwargs) for item in self),
+            concurrency,
+        )
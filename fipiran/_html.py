@@ -0,0 +1,97 @@
+"""Parsing of HTML tables of fipiran.com pages and exported files."""
+
+from __future__ import annotations as _
+
+from io import BytesIO as _BytesIO
+
+import polars as _pl
+from lxml.etree import iterparse as _iterparse
+
+from fipiran import _FIPIRAN, _read
+from fipiran.text import normalize as _normalize
+
+
+def _table(rows: list[list[str]]) -> _pl.DataFrame:
+    """Return a frame of strings using the first row as the header.
+
+    Short rows are padded, and missing or duplicate header names are
+    replaced by column_{index}.
+    """
+    width = max(map(len, rows))
+    header, *body = rows
+    names: list[str] = []
+    for i, name in enumerate(header + [''] * (width - len(header))):
+        names.append(f'column_{i}' if not name or name in names else name)
+    return _pl.DataFrame(
+        [row + [''] * (width - len(row)) for row in body],
+        schema=[(c, _pl.String) for c in names],
+        orient='row',
+    )
+
+
+def html_tables(content: bytes) -> list[_pl.DataFrame]:
+    """Return the tables of an HTML document as frames of strings.
+
+    content is parsed incrementally and each row is discarded as soon as
+    its cells are read. The first row of each table is used as its header.
+    Cells holding only a checkbox are read as 'true' or 'false'.
+    """
+    tables = []
+    rows: list[list[str]] = []
+    row: list[str] = []
+    for _event, element in _iterparse(
+        _BytesIO(content),
+        events=('end',),
+        tag=('td', 'th', 'tr', 'table'),
+        html=True,
+        encoding='utf-8',
+    ):
+        tag = element.tag
+        if tag == 'td' or tag == 'th':
+            text = ''.join(element.itertext()).strip()
+            if not text:
+                checkbox = element.find('.//input[@type="checkbox"]')
+                if checkbox is not None:
+                    text = 'true' if 'checked' in checkbox.attrib else 'false'
+            row.append(text)
+            continue
+        if tag == 'tr':
+            rows.append(row)
+            row = []
+        elif rows:  # table
+            tables.append(_table(rows))
+            rows = []
+        element.clear()
+    return tables
+
+
+def typed(df: _pl.DataFrame) -> _pl.DataFrame:
+    """Convert numeric string columns of df to Int64/Float64.
+
+    Thousands separators and accounting negatives like (186) are
+    supported. All columns are normalized using text.normalize first.
+    """
+    columns = []
+    for s in df.with_columns(
+        _normalize(_pl.all()).replace('', None)
+    ).get_columns():
+        number = (
+            s.str.replace_all(',', '', literal=True)
+            .str.replace(r'^\((.*)\)$', '-$1')
+            .cast(_pl.Float64, strict=False)
+        )
+        if number.null_count() != s.null_count():
+            columns.append(s)
+        elif (number == number.round()).all():
+            columns.append(number.cast(_pl.Int64))
+        else:
+            columns.append(number)
+    return _pl.DataFrame(columns)
+
+
+async def fipiran_tables(path: str, params=None) -> list[_pl.DataFrame]:
+    """Return the typed tables of a fipiran.com page."""
+    return [
+        typed(df)
+        for df in html_tables(await _read(f'{_FIPIRAN}{path}', params=params))
+    ]
@@ -0,0 +1,211 @@
+"""Lazy Polars expressions for time series analysis of history frames.
+
+The expressions work on the frames returned by Symbol.history (default
+column names) and on fund frames like Fund.navps_history (pass e.g.
+``price='cancelNav', by=None``). Rows must be sorted by date within each
+``by`` group, e.g. using symbols.adjust_history or ``lf.sort(by, date)``.
+Because every expression is evaluated over ``by``, a concatenation of many
+symbols is processed in a single query plan.
+
+The cross-fund functions (nav_matrix, peer_ranks, correlations and
+rolling_alpha_beta) work on funds.funds and funds.navps_histories frames.
+"""
+
+from __future__ import annotations as _
+
+from collections.abc import Iterable as _Iterable
+
+import numpy as _np
+import polars as _pl
+from polars import col as _col
+
+_HISTORY_AGGS = (
+    _col('priceFirst').first(),
+    _col('priceMax').max(),
+    _col('priceMin').min(),
+    _col('closingPrice').last(),
+    _col('lastTransaction').last(),
+    _col('numberOfTransactions').sum(),
+    _col('numberOfVolume').sum(),
+    _col('transactionValue').sum(),
+)
+
+
+def _over(expr: _pl.Expr, by: str | None) -> _pl.Expr:
+    return expr if by is None else expr.over(by)
+
+
+def log_returns(
+    price: str = 'closingPrice', *, by: str | None = 'insCode'
+) -> _pl.Expr:
+    return _over(_col(price).log().diff(), by).alias('logReturn')
+
+
+def moving_average(
+    window: int, price: str = 'closingPrice', *, by: str | None = 'insCode'
+) -> _pl.Expr:
+    return _over(_col(price).rolling_mean(window), by).alias(f'ma{window}')
+
+
+def rolling_volatility(
+    window: int, price: str = 'closingPrice', *, by: str | None = 'insCode'
+) -> _pl.Expr:
+    """Return the rolling standard deviation of log returns."""
+    return _over(_col(price).log().diff().rolling_std(window), by).alias(
+        f'volatility{window}'
+    )
+
+
+def ema(
+    span: int, price: str = 'closingPrice', *, by: str | None = 'insCode'
+) -> _pl.Expr:
+    return _over(_col(price).ewm_mean(span=span, adjust=False), by).alias(
+        f'ema{span}'
+    )
+
+
+def rsi(
+    period: int = 14,
+    price: str = 'closingPrice',
+    *,
+    by: str | None = 'insCode',
+) -> _pl.Expr:
+    """Return Wilder's relative strength index."""
+    diff = _col(price).diff()
+    alpha = 1 / period
+    up = diff.clip(lower_bound=0).ewm_mean(alpha=alpha, adjust=False)
+    down = (-diff).clip(lower_bound=0).ewm_mean(alpha=alpha, adjust=False)
+    return _over(100 * up / (up + down), by).alias(f'rsi{period}')
+
+
+def drawdown(
+    price: str = 'closingPrice', *, by: str | None = 'insCode'
+) -> _pl.Expr:
+    """Return the relative distance of price from its running maximum."""
+    return _over(_col(price) / _col(price).cum_max() - 1, by).alias('drawdown')
+
+
+def resample(
+    lf: _pl.LazyFrame,
+    every: str,
+    *,
+    date: str = 'transactionDate',
+    by: str | None = 'insCode',
+    aggs: _Iterable[_pl.Expr] | None = None,
+) -> _pl.LazyFrame:
+    """Return bars of the given period, e.g. '1w' or '1mo'.
+
+    By default lf is assumed to be a history frame and OHLCV bars are
+    returned. Pass aggs for other frames, e.g. ``[pl.all().last()]`` for
+    Fund.navps_history.
+    """
+    return (
+        lf.sort(date if by is None else [by, date])
+        .group_by_dynamic(date, every=every, group_by=by)
+        .agg(_HISTORY_AGGS if aggs is None else aggs)
+    )
+
+
+def nav_matrix(lf: _pl.LazyFrame, /, value='cancelNav') -> _pl.DataFrame:
+    """Return a date × regNo matrix of value, sorted by date.
+
+    lf is expected to be the result of funds.navps_histories.
+    """
+    return (
+        lf.select('date', 'regNo', value)
+        .collect()
+        .pivot('regNo', index='date', values=value, aggregate_function='last')
+        .sort('date')
+    )
+
+
+def peer_ranks(
+    lf: _pl.LazyFrame,
+    /,
+    columns: _Iterable[str] = ('annualEfficiency',),
+    *,
+    by: str | list[str] = 'fundType',
+) -> _pl.LazyFrame:
+    """Add the rank of each fund among its peers for each of the columns.
+
+    lf is expected to be the result of funds.funds. For each column a
+    `{column}Rank` column is added, 1 being the highest value within the
+    `by` group; peerCount is the size of the group.
+    """
+    return lf.with_columns(
+        *[
+            _col(c)
+            .rank('min', descending=True)
+            .over(by)
+            .cast(_pl.Int32)
+            .alias(f'{c}Rank')
+            for c in columns
+        ],
+        peerCount=_pl.len().over(by),
+    )
+
+
+def correlations(matrix: _pl.DataFrame, /) -> _pl.DataFrame:
+    """Return the pairwise correlation of log returns of matrix columns.
+
+    matrix is expected to be the result of nav_matrix. Each pair is
+    correlated over the dates on which both have returns. The result has a
+    regNo column followed by one column per fund.
+    """
+    names = matrix.columns[1:]
+    x = matrix.select(_col(names).log().diff()).to_numpy()
+    mask = ~_np.isnan(x)
+    x = _np.where(mask, x, 0.0)
+    m = mask.astype(_np.float64)
+    # sums over the dates both members of each pair have a return
+    n = m.T @ m
+    sx = x.T @ m
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+    with _np.errstate(divide='ignore', invalid='ignore'):
+        r = (n * sxy - sx * sx.T) / _np.sqrt(
+            (n * sxx - sx * sx) * (n * sxx.T - sx.T * sx.T)
+        )
+    return _pl.DataFrame(r, schema=names, nan_to_null=True).insert_column(
+        0, _pl.Series('regNo', names)
+    )
+
+
+def rolling_alpha_beta(
+    lf: _pl.LazyFrame,
+    benchmark: _pl.LazyFrame,
+    window: int,
+    *,
+    value: str = 'cancelNav',
+    benchmark_value: str = 'cancelNav',
+) -> _pl.LazyFrame:
+    """Return rolling regression of fund returns on benchmark returns.
+
+    lf is expected to be the result of funds.navps_histories and benchmark
+    a frame with a date and a benchmark_value column, e.g. a
+    Fund.navps_history. Returns date, regNo, alpha and beta columns, where
+    alpha is the per-period intercept of log returns.
+    """
+    b = benchmark.sort('date').select(
+        'date', bench=_col(benchmark_value).log().diff()
+    )
+    r = _col('ret')
+    return (
+        lf.sort('regNo', 'date')
+        .select('date', 'regNo', ret=_col(value).log().diff().over('regNo'))
+        .join(b, on='date')
+        .sort('regNo', 'date')
+        .with_columns(
+            beta=(
+                _pl.rolling_cov(r, 'bench', window_size=window)
+                / _col('bench').rolling_var(window)
+            ).over('regNo')
+        )
+        .with_columns(
+            alpha=(
+                r.rolling_mean(window)
+                - _col('beta') * _col('bench').rolling_mean(window)
+            ).over('regNo')
+        )
+        .select('date', 'regNo', 'alpha', 'beta')
+    )
@@ -7,4 +7,6 @@ class StrictModel(BaseModel, extra='forbid'):
     pass
 
 
+# the real model, for the tests of _LooseModel itself
+LooseModel = fipiran._LooseModel
 fipiran._LooseModel = StrictModel
@@ -0,0 +1,332 @@
+"""Bulk export of endpoints to Parquet, CSV or NDJSON files.
+
+Snapshot datasets (e.g. funds) are written to ``{output}/{dataset}.{ext}``.
+Per-item datasets (e.g. history of each insCode) are written to
+``{output}/{dataset}/{item}.{ext}`` as soon as each item arrives, so only
+about `concurrency` items are held in memory at any time. This module is
+used by ``python -m fipiran``.
+"""
+
+from __future__ import annotations as _
+
+from asyncio import (
+    Semaphore as _Semaphore,
+    as_completed as _as_completed,
+    sleep as _sleep,
+)
+from collections.abc import (
+    Awaitable as _Awaitable,
+    Callable as _Callable,
+    Iterable as _Iterable,
+)
+from datetime import datetime as _datetime
+from pathlib import Path as _Path
+from time import monotonic as _monotonic
+from typing import Literal as _Literal
+
+import polars as _pl
+from polars import col as _col
+
+from fipiran import funds as _funds, symbols as _symbols
+from fipiran.text import normalize_strings as _normalize_strings
+
+Format = _Literal['parquet', 'csv', 'ndjson']
+
+
+async def _instruments() -> _pl.LazyFrame:
+    return (await _symbols.search())[0]
+
+
+async def _transactions() -> _pl.LazyFrame:
+    return (await _symbols.search())[1]
+
+
+SNAPSHOTS: dict[str, _Callable[[], _Awaitable[_pl.LazyFrame]]] = {
+    'instruments': _instruments,
+    'transactions': _transactions,
+    'index-compare': _symbols.index_compare,
+    'industries': _symbols.industries,
+    'sub-industries': _symbols.sub_industries,
+    'funds': _funds.funds,
+    'fund-types': _funds.fund_types,
+    'average-returns': _funds.average_returns,
+    'map-data': _funds.map_data,
+}
+
+
+async def _history(ins_code: str, last: _datetime | None) -> _pl.LazyFrame:
+    symbol = _symbols.Symbol(ins_code)
+    if last is None:
+        return await symbol.history()
+    # there are at most as many new sessions as days since the last one
+    return await symbol.history(limit=(_datetime.now() - last).days + 1)
+
+
+def _fund_chart(
+    method: _Callable[..., _Awaitable[_pl.LazyFrame]],
+) -> _Callable[[str, _datetime | None], _Awaitable[_pl.LazyFrame]]:
+    async def fetch(reg_no: str, last: _datetime | None) -> _pl.LazyFrame:
+        fund = _funds.Fund(reg_no)
+        # without showAll only the last year of the chart is returned
+        lf = await method(fund, all_=last is None)
+        if last is not None:
+            first = lf.select(_col('date').min()).collect().item()
+            if first is None or first > last:
+                lf = await method(fund, all_=True)
+        return lf.with_columns(regNo=_pl.lit(reg_no))
+
+    return fetch
+
+
+async def _asset_allocation(
+    reg_no: str, last: _datetime | None
+) -> _pl.LazyFrame:
+    lf = await _funds.Fund(reg_no).asset_allocation_history()
+    return lf.with_columns(regNo=_pl.lit(reg_no))
+
+
+# name: (fetch(item, last date or None), date column, item kind)
+PER_ITEM: dict[
+    str,
+    tuple[
+        _Callable[[str, _datetime | None], _Awaitable[_pl.LazyFrame]],
+        str,
+        _Literal['insCode', 'regNo'],
+    ],
+] = {
+    'history': (_history, 'transactionDate', 'insCode'),
+    'navps': (_fund_chart(_funds.Fund.navps_history), 'date', 'regNo'),
+    'nav': (_fund_chart(_funds.Fund.nav_history), 'date', 'regNo'),
+    'alpha-beta': (_fund_chart(_funds.Fund.alpha_beta), 'date', 'regNo'),
+    'asset-allocation': (_asset_allocation, 'date', 'regNo'),
+}
+
+
+async def all_items(kind: _Literal['insCode', 'regNo']) -> list[str]:
+    """Return all insCodes of search or all regNos of funds."""
+    if kind == 'insCode':
+        lf = await _instruments()
+    else:
+        lf = await _funds.funds()
+    return lf.select(_col(kind).cast(_pl.String)).collect()[kind].to_list()
+
+
+class _RateLimiter:
+    """Space out calls to wait by at least 1/rate seconds."""
+
+    __slots__ = ('_interval', '_next')
+
+    def __init__(self, rate: float | None):
+        self._interval = 1 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        now = _monotonic()
+        at = max(now, self._next)
+        self._next = at + self._interval
+        await _sleep(at - now)
+
+
+def _csv_safe(df: _pl.DataFrame) -> _pl.DataFrame:
+    """Convert list and struct columns to strings which CSV can hold."""
+    return df.with_columns(
+        *[
+            _col(n).cast(_pl.List(_pl.String)).list.join(',')
+            for n, t in df.schema.items()
+            if isinstance(t, _pl.List | _pl.Array)
+        ],
+        *[
+            _col(n).struct.json_encode()
+            for n, t in df.schema.items()
+            if isinstance(t, _pl.Struct)
+        ],
+    )
+
+
+def _write(df: _pl.DataFrame, path: _Path, format: Format) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.tmp')
+    if format == 'parquet':
+        df.write_parquet(tmp)
+    elif format == 'csv':
+        _csv_safe(df).write_csv(tmp)
+    else:
+        df.write_ndjson(tmp)
+    tmp.replace(path)
+
+
+def _read(path: _Path, format: Format) -> _pl.DataFrame:
+    if format == 'parquet':
+        return _pl.read_parquet(path)
+    if format == 'csv':
+        return _pl.read_csv(
+            path, try_parse_dates=True, infer_schema_length=None
+        )
+    return _pl.read_ndjson(path, infer_schema_length=None)
+
+
+def _partition_value(value) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _write_partitioned(
+    df: _pl.DataFrame,
+    directory: _Path,
+    name: str,
+    format: Format,
+    partition_by: list[str],
+) -> list[_Path]:
+    """Write df to {directory}/{col}={value}/.../{name}.{format}.
+
+    Return the written paths.
+    """
+    if not partition_by:
+        path = directory / f'{name}.{format}'
+        _write(df, path, format)
+        return [path]
+    paths = []
+    for key, part in df.partition_by(
+        partition_by, as_dict=True, include_key=False
+    ).items():
+        sub = directory.joinpath(
+            *[
+                f'{c}={_partition_value(v)}'
+                for c, v in zip(partition_by, key, strict=True)
+            ]
+        )
+        paths.append(sub / f'{name}.{format}')
+        _write(part, paths[-1], format)
+    return paths
+
+
+async def export_snapshot(
+    dataset: str,
+    output: _Path | str,
+    *,
+    format: Format = 'parquet',
+    partition_by: _Iterable[str] = (),
+    normalize: bool = False,
+) -> None:
+    """Export one of SNAPSHOTS to {output}/{dataset}.{format}.
+
+    With partition_by, {output}/{dataset}/{col}={value}/data.{format}
+    files are written instead.
+    """
+    output = _Path(output)
+    lf = await SNAPSHOTS[dataset]()
+    if normalize:
+        lf = _normalize_strings(lf)
+    df = lf.collect()
+    if partition_by := [*partition_by]:
+        _write_partitioned(df, output / dataset, 'data', format, partition_by)
+    else:
+        _write(df, output / f'{dataset}.{format}', format)
+
+
+async def export_items(
+    dataset: str,
+    output: _Path | str,
+    items: _Iterable[str] | None = None,
+    *,
+    format: Format = 'parquet',
+    concurrency: int = 8,
+    rate_limit: float | None = None,
+    incremental: bool = False,
+    partition_by: _Iterable[str] = (),
+    normalize: bool = False,
+) -> int:
+    """Export one of PER_ITEM for each of items and return their count.
+
+    items are insCodes or regNos and default to all of them. Each item is
+    written to {output}/{dataset}/{item}.{format} when it arrives.
+
+    rate_limit is the maximum number of requests started per second. In
+    incremental mode, only the rows newer than the existing file of each
+    item are fetched (where the endpoint allows) and merged into it.
+
+    Items that fail do not stop the export. After the other items are
+    written, an ExceptionGroup of their errors is raised; each error has a
+    note with its item, so a rerun can be limited to the failed items.
+    """
+    fetch, date, kind = PER_ITEM[dataset]
+    directory = _Path(output) / dataset
+    partition_by = [*partition_by]
+    if items is None:
+        items = await all_items(kind)
+    items = [*items]
+    limiter = _RateLimiter(rate_limit)
+    semaphore = _Semaphore(concurrency)
+
+    def read_old(item: str) -> tuple[_pl.DataFrame | None, list[_Path]]:
+        if not partition_by:
+            path = directory / f'{item}.{format}'
+            paths = [path] if path.exists() else []
+        else:
+            paths = [*directory.glob(f'**/{item}.{format}')]
+        if not paths:
+            return None, paths
+        # partition columns are only stored in the directory names
+        dfs = [
+            _read(p, format).with_columns(
+                _pl.lit(value).alias(name)
+                for name, value in (
+                    part.split('=', 1)
+                    for part in p.parent.relative_to(directory).parts
+                )
+            )
+            for p in paths
+        ]
+        old = _pl.concat(dfs, how='diagonal_relaxed')
+        if old.schema[date] == _pl.String:
+            old = old.with_columns(_col(date).str.to_datetime())
+        return old, paths
+
+    async def job(
+        item: str,
+    ) -> tuple[str, _pl.DataFrame | Exception, list[_Path]]:
+        try:
+            return await fetch_item(item)
+        except Exception as e:
+            e.add_note(f'{kind} {item}')
+            return item, e, []
+
+    async def fetch_item(
+        item: str,
+    ) -> tuple[str, _pl.DataFrame, list[_Path]]:
+        async with semaphore:
+            old, old_paths = read_old(item) if incremental else (None, [])
+            await limiter.wait()
+            last = None if old is None else old.select(_col(date).max()).item()
+            lf = await fetch(item, last)
+            if normalize:
+                lf = _normalize_strings(lf)
+            df = lf.collect()
+            if old is not None:
+                # CSV and NDJSON files do not keep all the dtypes
+                old = old.cast(
+                    {c: t for c, t in df.schema.items() if c in old.schema}
+                )
+                df = (
+                    _pl.concat([old, df], how='diagonal_relaxed')
+                    .unique(date, keep='last')
+                    .sort(date)
+                )
+            return item, df, old_paths
+
+    errors: list[Exception] = []
+    for done in _as_completed([job(i) for i in items]):
+        item, df, old_paths = await done
+        if isinstance(df, Exception):
+            errors.append(df)
+            continue
+        # old files are removed only after the merged data is written
+        written = _write_partitioned(df, directory, item, format, partition_by)
+        for path in old_paths:
+            if path not in written:
+                path.unlink()
+    if errors:
+        raise ExceptionGroup(
+            f'{len(errors)} of {len(items)} items of {dataset} failed',
+            errors,
+        )
+    return len(items)
@@ -1,12 +1,21 @@
 from __future__ import annotations as _
 
+from asyncio import gather as _agather
+from collections.abc import Iterable as _Iterable
 from datetime import (
     datetime as _datetime,
     timedelta as _timedelta,
     timezone as _timezone,
 )
-from typing import Annotated as _Annotated
+from pathlib import Path as _Path
+from typing import (
+    Annotated as _Annotated,
+    Any as _Any,
+    Literal as _Literal,
+    overload as _overload,
+)
 
+import numpy as _np
 import polars as _pl
 from pydantic import (
     AfterValidator as _AfterValidator,
@@ -14,7 +23,9 @@ from pydantic import (
     RootModel as _RootModel,
 )
 
-from fipiran import _api, _LooseModel
+from fipiran import _api, _api_struct, _gather, _LooseModel
+from fipiran._codeset import CodeSet as _CodeSet
+from fipiran.text import normalize_strings as _normalize_strings
 
 
 class _SpecificFundInfo(_LooseModel):
@@ -149,6 +160,9 @@ class AlphaBeta(_LooseModel):
     alpha: float
 
 
+_AlphaBetas = _RootModel[list[AlphaBeta]]
+
+
 class AssetsOnDate(_LooseModel):
     date: _datetime
     netAsset: int
@@ -156,6 +170,9 @@ class AssetsOnDate(_LooseModel):
     unitsRedDAY: int
 
 
+_AssetsOnDates = _RootModel[list[AssetsOnDate]]
+
+
 class NavOnDate(_LooseModel):
     date: _datetime
     issueNav: float
@@ -163,6 +180,9 @@ class NavOnDate(_LooseModel):
     statisticalNav: float
 
 
+_NavOnDates = _RootModel[list[NavOnDate]]
+
+
 class PortfolioOnDate(_LooseModel):
     date: _datetime
     fiveBest: float
@@ -173,6 +193,9 @@ class PortfolioOnDate(_LooseModel):
     deposit: float
 
 
+_PortfolioOnDates = _RootModel[list[PortfolioOnDate]]
+
+
 class Fund:
     __slots__ = ('group_id', 'reg_no')
 
@@ -183,14 +206,24 @@ class Fund:
     def __repr__(self):
         return f'{type(self).__name__}({self.reg_no!r}, {self.group_id!r})'
 
+    def _key(self) -> tuple[int, int]:
+        return int(self.reg_no), int(self.group_id)
+
+    def __eq__(self, other):
+        return isinstance(other, Fund) and other._key() == self._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     async def _api[T: _BaseModel](
-        self, path, *, model: type[T], **kwargs
+        self, path, *, model: type[T], request=_api, **kwargs
     ) -> T:
+        # request is _api or _api_struct; the latter returns a struct
         params = {'regno': self.reg_no, 'groupId': self.group_id}
         kw_params = kwargs.get('params')
         if kw_params is not None:
             params |= kw_params
-        return await _api(
+        return await request(
             path=path,
             params=params,
             model=model,
@@ -203,7 +236,7 @@ class Fund:
         """
         m = await self._api(
             'chart/portfoliochart',
-            model=_RootModel[list[PortfolioOnDate]],
+            model=_PortfolioOnDates,
         )
         return _pl.LazyFrame(
             [vars(i) for i in m.root], infer_schema_length=None
@@ -217,7 +250,7 @@ class Fund:
         m = await self._api(
             'chart/getfundchart',
             params={'showAll': str(all_).lower()},
-            model=_RootModel[list[NavOnDate]],
+            model=_NavOnDates,
         )
         return _pl.LazyFrame(
             [vars(i) for i in m.root], infer_schema_length=None
@@ -231,7 +264,7 @@ class Fund:
         m = await self._api(
             'chart/getfundnetassetchart',
             params={'showAll': str(all_).lower()},
-            model=_RootModel[list[AssetsOnDate]],
+            model=_AssetsOnDates,
         )
         return _pl.LazyFrame(vars(i) for i in m.root).sort('date')
 
@@ -241,13 +274,81 @@ class Fund:
             await self._api(
                 'chart/alphabetachart',
                 params={'showAll': str(all_).lower()},
-                model=_RootModel[list[AlphaBeta]],
+                model=_AlphaBetas,
             )
         ).root
         return _pl.LazyFrame(vars(i) for i in items).sort('date')
 
-    async def info(self) -> SpecificFundInfo:
-        return (await self._api('fund/getfund', model=_SpecificFundInfo)).item
+    @_overload
+    async def info(
+        self, *, struct: _Literal[False] = False
+    ) -> SpecificFundInfo: ...
+
+    @_overload
+    async def info(self, *, struct: _Literal[True]) -> _Any: ...
+
+    async def info(self, *, struct: bool = False) -> _Any:
+        """Return fund info.
+
+        If struct is True, a lightweight structs.struct_type(SpecificFundInfo)
+        object is returned instead.
+        """
+        return (
+            await self._api(
+                'fund/getfund',
+                model=_SpecificFundInfo,
+                request=_api_struct if struct else _api,
+            )
+        ).item
+
+
+async def navps_histories(
+    funds: _Iterable[Fund], /, *, all_=True, concurrency: int = 8
+) -> _pl.LazyFrame:
+    """Return NAVPS history of many funds as one LazyFrame.
+
+    The result has a regNo column in addition to the columns of
+    Fund.navps_history and is sorted by regNo and date.
+    """
+    funds = [*funds]
+    lfs = await _gather(
+        (f.navps_history(all_=all_) for f in funds), concurrency
+    )
+    return _pl.concat(
+        [
+            lf.with_columns(regNo=_pl.lit(str(f.reg_no)))
+            for f, lf in zip(funds, lfs, strict=True)
+        ],
+        how='diagonal_relaxed',
+    ).sort('regNo', 'date')
+
+
+class FundSet(_CodeSet):
+    """A set of funds stored as an Int64 regNo column.
+
+    Supports set operators (|, &, -, ^), membership tests of Fund, str or
+    int, and filtering frames by their regNo column. Only funds of the
+    default group_id are supported: adding other ones raises ValueError
+    and they are never members. Iterating yields Fund objects.
+    """
+
+    __slots__ = ()
+    _column = 'regNo'
+
+    def _item(self, code: int) -> Fund:
+        return Fund(str(code))
+
+    def _code(self, item) -> int:
+        if not isinstance(item, Fund):
+            return int(item)
+        if int(item.group_id) != 0:
+            raise ValueError(f'{item!r} is not of the default group_id')
+        return int(item.reg_no)
+
+    async def navps_histories(
+        self, *, all_=True, concurrency: int = 8
+    ) -> _pl.LazyFrame:
+        return await navps_histories(self, all_=all_, concurrency=concurrency)
 
 
 def _fix_website_address(lf: _pl.LazyFrame) -> _pl.LazyFrame:
@@ -311,9 +412,16 @@ class FundInfo(_CommonFundInfo):
     websiteAddress: list[str]
 
 
-async def funds() -> _pl.LazyFrame:
+async def funds(
+    reg_nos: _Iterable[int | str] = (),
+    *,
+    show_market_makers: bool = False,
+    normalize: bool = False,
+) -> _pl.LazyFrame:
     """Return a LazyFrame representing https://www.fipiran.com/mf/list.
 
+    If reg_nos is given, only those funds are downloaded.
+    normalize applies text.normalize_strings to the result.
     See funds.FundInfo for column names.
     """
     m = await _api(
@@ -321,13 +429,16 @@ async def funds() -> _pl.LazyFrame:
         model=_Funds,
         method='post',
         json={
-            'regNos': [],
-            'showMarketMakers': False,
+            'regNos': [str(r) for r in reg_nos],
+            'showMarketMakers': show_market_makers,
         },
     )
     assert m.totalCount <= m.pageSize
     lf = _pl.LazyFrame([vars(i) for i in m.items], infer_schema_length=None)
-    return _fix_website_address(lf)
+    lf = _fix_website_address(lf)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class _FundTypes(_LooseModel):
@@ -345,11 +456,17 @@ class FundType(_LooseModel):
     isActive: bool
 
 
-async def fund_types() -> _pl.LazyFrame:
-    """See funds.FundType for column names."""
+async def fund_types(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See funds.FundType for column names.
+
+    normalize applies text.normalize_strings to the result.
+    """
     m = await _api('fund/fundtype', model=_FundTypes)
     assert m.totalCount <= m.pageSize
-    return _pl.LazyFrame([vars(i) for i in m.items])
+    lf = _pl.LazyFrame([vars(i) for i in m.items])
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class AverageReturns(_LooseModel):
@@ -369,17 +486,22 @@ class AverageReturns(_LooseModel):
     efficiency: float | None = None
 
 
-async def average_returns() -> _pl.LazyFrame:
+_AverageReturnsList = _RootModel[list[AverageReturns]]
+
+
+async def average_returns(*, normalize: bool = False) -> _pl.LazyFrame:
     """Return a LazyFrame for https://www.fipiran.com/mf/efficiency.
 
     See AverageReturns for column names.
+    normalize applies text.normalize_strings to the result.
     """
-    m = await _api(
-        'fund/averagereturns', model=_RootModel[list[AverageReturns]]
-    )
-    return _pl.LazyFrame(vars(i) for i in m.root).with_columns(
+    m = await _api('fund/averagereturns', model=_AverageReturnsList)
+    lf = _pl.LazyFrame(vars(i) for i in m.root).with_columns(
         _pl.col('netAsset').cast(_pl.Int64)
     )
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class _TreeMap(_LooseModel):
@@ -420,11 +542,17 @@ class TreeMapItem(_CommonFundInfo):
     websiteAddress: list[str]
 
 
-async def map_data() -> _pl.LazyFrame:
-    """See TreeMapItem for column names."""
+async def map_data(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See TreeMapItem for column names.
+
+    normalize applies text.normalize_strings to the result.
+    """
     m = await _api('fund/treemap', model=_TreeMap)
     lf = _pl.LazyFrame([vars(i) for i in m.items], infer_schema_length=None)
-    return _fix_website_address(lf)
+    lf = _fix_website_address(lf)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class _DepData(_LooseModel):
@@ -490,7 +618,316 @@ class Guarantor(_LooseModel):
     webSite: str | None = None
 
 
-async def dependency_graph_data() -> _pl.LazyFrame:
-    """See DepItem for column names."""
+async def dependency_graph_data(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See DepItem for column names.
+
+    normalize applies text.normalize_strings to the result; the strings
+    inside the manager and guarantor structs are left as they are.
+    """
+    m = await _api('fund/dependencygraph', model=_DepData)
+    lf = _pl.LazyFrame(vars(i) for i in m.items)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
+
+
+def _csr(index: _pl.Series, size: int) -> tuple[_np.ndarray, _np.ndarray]:
+    """Return (order, offsets) of a node index column.
+
+    Rows pointing to node i are order[offsets[i]:offsets[i + 1]].
+    """
+    nodes = index.fill_null(size).to_numpy()
+    order = _np.argsort(nodes, kind='stable')
+    offsets = _np.zeros(size + 1, _np.int64)
+    _np.cumsum(_np.bincount(nodes, minlength=size + 1)[:size], out=offsets[1:])
+    return order, offsets
+
+
+class DependencyGraph:
+    """Normalized form of dependency_graph_data.
+
+    managers and guarantors are deduplicated node tables (see funds.Manager
+    and funds.Guarantor for column names). funds is the edge table: the
+    DepItem columns without the nested manager and guarantor records, but
+    with managerIndex and guarantorIndex columns that refer to rows of the
+    node tables. Funds of each node are also indexed in CSR form, so
+    funds_of_manager and funds_of_guarantor do not scan the edge table.
+    """
+
+    __slots__ = (
+        '_guarantor_csr',
+        '_guarantor_ids',
+        '_manager_csr',
+        '_manager_ids',
+        'funds',
+        'guarantors',
+        'managers',
+    )
+
+    def __init__(self, items: _Iterable[DepItem]):
+        manager_ids: dict[int, int] = {}
+        guarantor_ids: dict[int, int] = {}
+        managers: list[dict] = []
+        guarantors: list[dict] = []
+        rows = []
+        for item in items:
+            row = vars(item).copy()
+            if (manager := row.pop('manager')) is not None:
+                i = manager_ids.setdefault(manager.managerId, len(managers))
+                if i == len(managers):
+                    managers.append(vars(manager))
+                row['managerIndex'] = i
+            if (guarantor := row.pop('guarantor')) is not None:
+                i = guarantor_ids.setdefault(
+                    guarantor.guarantorId, len(guarantors)
+                )
+                if i == len(guarantors):
+                    guarantors.append(vars(guarantor))
+                row['guarantorIndex'] = i
+            rows.append(row)
+
+        self._manager_ids = manager_ids
+        self._guarantor_ids = guarantor_ids
+        self.managers = _pl.DataFrame(managers, infer_schema_length=None)
+        self.guarantors = _pl.DataFrame(guarantors, infer_schema_length=None)
+        funds = _pl.DataFrame(rows, infer_schema_length=None)
+        # the columns are missing if no item has a manager or guarantor
+        self.funds = funds.with_columns(
+            _pl.col(c).cast(_pl.UInt32)
+            if c in funds.columns
+            else _pl.lit(None, _pl.UInt32).alias(c)
+            for c in ('managerIndex', 'guarantorIndex')
+        )
+        self._manager_csr = _csr(self.funds['managerIndex'], len(managers))
+        self._guarantor_csr = _csr(
+            self.funds['guarantorIndex'], len(guarantors)
+        )
+
+    def __repr__(self):
+        return (
+            f'<{type(self).__name__}: {len(self.funds)} funds, '
+            f'{len(self.managers)} managers, '
+            f'{len(self.guarantors)} guarantors>'
+        )
+
+    def _funds_of(self, csr, i: int | None) -> _pl.DataFrame:
+        if i is None:
+            return self.funds.clear()
+        order, offsets = csr
+        return self.funds[order[offsets[i] : offsets[i + 1]]]
+
+    def funds_of_manager(self, manager_id: int) -> _pl.DataFrame:
+        return self._funds_of(
+            self._manager_csr, self._manager_ids.get(manager_id)
+        )
+
+    def funds_of_guarantor(self, guarantor_id: int) -> _pl.DataFrame:
+        return self._funds_of(
+            self._guarantor_csr, self._guarantor_ids.get(guarantor_id)
+        )
+
+    def _exposure(self, nodes: _pl.DataFrame, index: str) -> _pl.DataFrame:
+        totals = self.funds.group_by(index).agg(
+            fundCount=_pl.len(), netAsset=_pl.col('netAsset').sum()
+        )
+        return (
+            nodes.with_row_index(index)
+            .join(totals, on=index, how='left')
+            .drop(index)
+            .sort('netAsset', descending=True, nulls_last=True)
+        )
+
+    def manager_exposure(self) -> _pl.DataFrame:
+        """Return managers with their fundCount and total netAsset."""
+        return self._exposure(self.managers, 'managerIndex')
+
+    def guarantor_exposure(self) -> _pl.DataFrame:
+        """Return guarantors with their fundCount and total netAsset."""
+        return self._exposure(self.guarantors, 'guarantorIndex')
+
+
+async def dependency_graph() -> DependencyGraph:
     m = await _api('fund/dependencygraph', model=_DepData)
-    return _pl.LazyFrame(vars(i) for i in m.items)
+    return DependencyGraph(m.items)
+
+
+# repeated string columns of funds and map_data that FundStore interns
+_SHARED_STRINGS = (
+    'auditor',
+    'custodian',
+    'guarantor',
+    'manager',
+    'typeOfInvest',
+    'websiteAddress',
+)
+
+
+def _intern(lf: _pl.LazyFrame) -> _pl.DataFrame:
+    return lf.with_columns(
+        _pl.col(_SHARED_STRINGS).cast(_pl.Categorical)
+    ).collect()
+
+
+class FundStore:
+    """Fund reference data fetched once and shared between lookups.
+
+    funds and map_data are downloaded on first use only (or on refresh) and
+    kept in memory with their repeated string columns converted to
+    Categorical, which share one global dictionary across both frames.
+    info looks up the funds frame by regNo without scanning it.
+    """
+
+    __slots__ = ('_funds', '_map_data', '_rows')
+
+    def __init__(self):
+        self._funds: _pl.DataFrame | None = None
+        self._map_data: _pl.DataFrame | None = None
+        self._rows: dict[str, list[int]] = {}
+
+    def _set_funds(self, df: _pl.DataFrame):
+        self._funds = df
+        rows: dict[str, list[int]] = {}
+        for i, reg_no in enumerate(df['regNo']):
+            rows.setdefault(reg_no, []).append(i)
+        self._rows = rows
+
+    async def refresh(self) -> None:
+        """Download both datasets again."""
+        funds_lf, map_lf = await _agather(funds(), map_data())
+        self._set_funds(_intern(funds_lf))
+        self._map_data = _intern(map_lf)
+
+    async def _funds_df(self) -> _pl.DataFrame:
+        if self._funds is None:
+            self._set_funds(_intern(await funds()))
+        return self._funds  # type: ignore
+
+    async def funds(self) -> _pl.LazyFrame:
+        """See funds.funds."""
+        return (await self._funds_df()).lazy()
+
+    async def refresh_funds(
+        self, reg_nos: _Iterable[int | str]
+    ) -> _pl.LazyFrame:
+        """Download only reg_nos and return their up-to-date rows.
+
+        Meant for frequent checks of a watchlist. If the store has already
+        loaded funds, the rows of reg_nos are replaced with the new ones.
+        An empty reg_nos returns an empty frame without a request, because
+        the server treats it as all funds.
+        """
+        reg_nos = [str(r) for r in reg_nos]
+        if not reg_nos:
+            if self._funds is None:
+                return _pl.LazyFrame()
+            return self._funds.clear().lazy()
+        new = _intern(await funds(reg_nos))
+        if self._funds is not None:
+            self._set_funds(
+                _pl.concat(
+                    [
+                        self._funds.filter(~_pl.col('regNo').is_in(reg_nos)),
+                        new,
+                    ],
+                    how='diagonal_relaxed',
+                )
+            )
+        return new.lazy()
+
+    async def map_data(self) -> _pl.LazyFrame:
+        """See funds.map_data."""
+        if self._map_data is None:
+            self._map_data = _intern(await map_data())
+        return self._map_data.lazy()
+
+    async def info(
+        self, reg_no: int | str, group_id: int | None = None
+    ) -> dict:
+        """Return the funds row of reg_no as a dict.
+
+        If the fund has several rows (one per groupId), group_id selects
+        one of them, otherwise the first row is returned. Raise KeyError if
+        the fund is not found.
+        """
+        df = await self._funds_df()
+        for i in self._rows.get(str(reg_no), ()):
+            row = df.row(i, named=True)
+            if group_id is None or row['groupId'] == group_id:
+                return row
+        raise KeyError((reg_no, group_id))
+
+
+class NavIndex:
+    """Point-in-time NAV lookup keyed by (regNo, date).
+
+    Built from funds.navps_histories frames and kept sorted, so a batch of
+    (regNo, date) queries is answered with a single as-of join. Use
+    save and load to cache it locally and update to add newer data.
+    """
+
+    __slots__ = ('df',)
+
+    def __init__(self, lf: _pl.LazyFrame | None = None):
+        self.df = _pl.DataFrame(
+            schema={
+                'regNo': _pl.String,
+                'date': _pl.Datetime('us'),
+                'issueNav': _pl.Float64,
+                'cancelNav': _pl.Float64,
+                'statisticalNav': _pl.Float64,
+            }
+        )
+        if lf is not None:
+            self.update(lf)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} of {len(self.df)} rows>'
+
+    def update(self, lf: _pl.LazyFrame) -> None:
+        """Add the rows of a navps_histories frame, replacing old values."""
+        self.df = (
+            _pl.concat(
+                [self.df.lazy(), lf.select(self.df.columns)],
+                how='vertical_relaxed',
+            )
+            .unique(['regNo', 'date'], keep='last', maintain_order=True)
+            .sort('date', 'regNo')
+            .collect()
+        )
+
+    def save(self, path: _Path | str) -> None:
+        self.df.write_parquet(path)
+
+    @classmethod
+    def load(cls, path: _Path | str) -> NavIndex:
+        """Load a saved index, or return an empty one if path is missing."""
+        index = cls()
+        if _Path(path).exists():
+            index.update(_pl.scan_parquet(path))
+        return index
+
+    def lookup(self, queries: _pl.LazyFrame, /) -> _pl.LazyFrame:
+        """Return the latest NAVs on or before each query date.
+
+        queries must have regNo and date columns; the result has the same
+        rows in the same order, with NAV columns appended (null if no NAV
+        was published on or before the date).
+        """
+        return (
+            queries.with_row_index('_row')
+            .with_columns(
+                _pl.col('regNo').cast(_pl.String),
+                _pl.col('date').cast(_pl.Datetime('us')),
+            )
+            .sort('date')
+            .join_asof(
+                self.df.lazy().rename({'date': 'navDate'}),
+                left_on='date',
+                right_on='navDate',
+                by='regNo',
+                strategy='backward',
+                check_sortedness=False,
+            )
+            .sort('_row')
+            .drop('_row')
+        )
@@ -0,0 +1,231 @@
+"""Index values and constituents over time, cached locally.
+
+IndexStore accumulates the daily snapshots of symbols.index_compare
+(index values) and of ``search(idx_code=...)`` (index constituents), so
+running IndexStore.update once per session builds index histories and
+constituent intervals that are saved as parquet files. Index histories
+from other sources, e.g. ``Symbol(index_code).history()``, can be merged
+using IndexStore.add_values.
+
+Indices are identified by their insCode in an indexCode column, to keep
+them apart from the insCode of constituents.
+"""
+
+from __future__ import annotations as _
+
+from collections.abc import Iterable as _Iterable
+from datetime import date as _date
+from pathlib import Path as _Path
+
+import polars as _pl
+from polars import col as _col
+
+from fipiran import _gather
+from fipiran.symbols import index_compare as _index_compare, search as _search
+
+_VALUES_SCHEMA = {
+    'indexCode': _pl.String,
+    'date': _pl.Date,
+    'value': _pl.Float64,
+}
+_CONSTITUENTS_SCHEMA = {
+    'indexCode': _pl.String,
+    'insCode': _pl.String,
+}
+_MEMBERS_SCHEMA = {
+    'indexCode': _pl.String,
+    'insCode': _pl.String,
+    'validFrom': _pl.Date,
+    'validTo': _pl.Date,
+}
+
+
+class IndexStore:
+    """Index values and constituent intervals.
+
+    values has indexCode, date and value columns. members has indexCode,
+    insCode, validFrom and validTo columns; a symbol is a constituent on
+    the dates validFrom <= date < validTo, and validTo is null for current
+    constituents. Membership before the first update is unknown.
+    """
+
+    __slots__ = ('members', 'values')
+
+    def __init__(
+        self,
+        values: _pl.DataFrame | None = None,
+        members: _pl.DataFrame | None = None,
+    ):
+        self.values = (
+            _pl.DataFrame(schema=_VALUES_SCHEMA) if values is None else values
+        )
+        self.members = (
+            _pl.DataFrame(schema=_MEMBERS_SCHEMA)
+            if members is None
+            else members
+        )
+
+    def __repr__(self):
+        return (
+            f'<{type(self).__name__} of '
+            f'{self.values["indexCode"].n_unique()} indices>'
+        )
+
+    def add_values(
+        self,
+        lf: _pl.LazyFrame,
+        /,
+        *,
+        index_code: str | None = None,
+        date: str = 'transactionDate',
+        value: str = 'closingPrice',
+    ) -> None:
+        """Merge index values of lf, replacing existing (indexCode, date).
+
+        lf needs an indexCode column unless index_code is given.
+        """
+        new = lf.select(
+            indexCode=_col('indexCode')
+            if index_code is None
+            else _pl.lit(index_code),
+            date=_col(date).dt.date(),
+            value=_col(value).cast(_pl.Float64),
+        ).collect()
+        self.values = (
+            _pl.concat([self.values, new])
+            .unique(['indexCode', 'date'], keep='last', maintain_order=True)
+            .sort('indexCode', 'date')
+        )
+
+    def _update_members(self, snapshot: _pl.DataFrame, date: _date) -> None:
+        """Update members using the (indexCode, insCode) pairs of date.
+
+        Only the indices present in snapshot are updated. Intervals opened
+        on date itself are dropped instead of closed.
+        """
+        indices = snapshot.select('indexCode').unique()
+        current = self.members.filter(_col('validTo').is_null()).join(
+            indices, on='indexCode', how='semi'
+        )
+        gone = current.join(
+            snapshot, on=['indexCode', 'insCode'], how='anti'
+        ).with_columns(validTo=_pl.lit(date))
+        new = snapshot.join(
+            current, on=['indexCode', 'insCode'], how='anti'
+        ).with_columns(validFrom=_pl.lit(date), validTo=_pl.lit(None))
+        self.members = _pl.concat(
+            [
+                self.members.join(
+                    gone,
+                    on=['indexCode', 'insCode', 'validFrom'],
+                    how='anti',
+                ),
+                gone.filter(_col('validFrom') < _col('validTo')),
+                new.select(*_MEMBERS_SCHEMA).cast(_MEMBERS_SCHEMA),
+            ]
+        ).sort('indexCode', 'insCode', 'validFrom')
+
+    async def update(
+        self,
+        index_codes: _Iterable[str] | None = None,
+        *,
+        concurrency: int = 4,
+    ) -> None:
+        """Add the latest index values and constituents.
+
+        index_codes limits the indices whose constituents are fetched, by
+        default all the indices of index_compare. Indices for which search
+        returns no instruments keep their current constituents.
+        """
+        snapshot = (await _index_compare()).collect()
+        self.add_values(
+            snapshot.lazy().rename({'insCode': 'indexCode'}),
+            date='date',
+            value='lastValueDay',
+        )
+        if index_codes is None:
+            index_codes = snapshot['insCode']
+        index_codes = [*index_codes]
+        results = await _gather(
+            (_search(idx_code=c) for c in index_codes), concurrency
+        )
+        constituents = _pl.concat(
+            [
+                _pl.DataFrame(schema=_CONSTITUENTS_SCHEMA),
+                *[
+                    instruments.select(
+                        indexCode=_pl.lit(c, _pl.String),
+                        insCode=_col('insCode').cast(_pl.String),
+                    ).collect()
+                    for c, (instruments, _) in zip(
+                        index_codes, results, strict=True
+                    )
+                    # search returns a frame without columns if nothing
+                    # matches
+                    if 'insCode' in instruments.collect_schema()
+                ],
+            ]
+        ).unique()
+        date = snapshot.select(_col('date').max().dt.date()).item()
+        self._update_members(constituents, date)
+
+    def matrix(self) -> _pl.DataFrame:
+        """Return a date × indexCode matrix of values, sorted by date."""
+        return self.values.pivot(
+            'indexCode', index='date', values='value'
+        ).sort('date')
+
+    def constituents(self, date: _date | None = None) -> _pl.DataFrame:
+        """Return the (indexCode, insCode) pairs valid on date.
+
+        By default the current constituents are returned.
+        """
+        if date is None:
+            members = self.members.filter(_col('validTo').is_null())
+        else:
+            members = self.members.filter(
+                _col('validFrom') <= date,
+                _col('validTo').is_null() | (_col('validTo') > date),
+            )
+        return members.select('indexCode', 'insCode')
+
+    def membership(
+        self,
+        lf: _pl.LazyFrame,
+        /,
+        *,
+        date: str = 'transactionDate',
+        by: str = 'insCode',
+    ) -> _pl.LazyFrame:
+        """Add an indexCode column to rows of lf for each index they were in.
+
+        lf is e.g. a Symbol.history frame; a row appears once for every
+        index that contained its symbol on its date, and rows of symbols
+        that were not in any index are dropped.
+        """
+        day = _col(date).dt.date()
+        return (
+            lf.join(self.members.lazy().rename({'insCode': by}), on=by)
+            .filter(
+                _col('validFrom') <= day,
+                _col('validTo').is_null() | (_col('validTo') > day),
+            )
+            .drop('validFrom', 'validTo')
+        )
+
+    def save(self, directory: _Path | str) -> None:
+        directory = _Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.values.write_parquet(directory / 'index_values.parquet')
+        self.members.write_parquet(directory / 'index_members.parquet')
+
+    @classmethod
+    def load(cls, directory: _Path | str) -> IndexStore:
+        """Load a saved store, or return an empty one if it is missing."""
+        directory = _Path(directory)
+        values = directory / 'index_values.parquet'
+        members = directory / 'index_members.parquet'
+        return cls(
+            _pl.read_parquet(values) if values.exists() else None,
+            _pl.read_parquet(members) if members.exists() else None,
+        )
@@ -0,0 +1,112 @@
+"""Zero-copy hand-off of frames between processes using Arrow IPC files.
+
+share writes a frame to an uncompressed Arrow IPC file, by default in
+/dev/shm (i.e. shared memory) where available, and returns a FrameHandle.
+A handle is a small picklable object that can be sent to other processes
+(e.g. through a ProcessPoolExecutor) instead of the frame; there
+FrameHandle.read and FrameHandle.scan memory-map the file rather than
+copying it.
+
+Files are not removed automatically; call FrameHandle.unlink or use the
+handle as a context manager when it is no longer needed.
+"""
+
+from __future__ import annotations as _
+
+from collections.abc import Iterable as _Iterable
+from pathlib import Path as _Path
+from tempfile import gettempdir as _gettempdir
+from typing import Self as _Self
+from uuid import uuid4 as _uuid4
+
+import polars as _pl
+
+from fipiran import _gather
+from fipiran.symbols import Symbol as _Symbol
+
+
+def _directory(directory: _Path | str | None) -> _Path:
+    if directory is not None:
+        return _Path(directory)
+    shm = _Path('/dev/shm')
+    return shm if shm.is_dir() else _Path(_gettempdir())
+
+
+class FrameHandle:
+    """A reference to a frame shared using share."""
+
+    __slots__ = ('path',)
+
+    def __init__(self, path: _Path | str):
+        self.path = str(path)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r})'
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __enter__(self) -> _Self:
+        return self
+
+    def __exit__(self, *_):
+        self.unlink()
+
+    def read(self) -> _pl.DataFrame:
+        """Return the frame, memory-mapped."""
+        return _pl.read_ipc(self.path)
+
+    def scan(self) -> _pl.LazyFrame:
+        return _pl.scan_ipc(self.path)
+
+    def unlink(self) -> None:
+        _Path(self.path).unlink(missing_ok=True)
+
+
+def share(
+    df: _pl.DataFrame, /, directory: _Path | str | None = None
+) -> FrameHandle:
+    """Write df to an Arrow IPC file in directory and return its handle."""
+    path = _directory(directory) / f'fipiran-{_uuid4().hex}.arrow'
+    tmp = path.with_suffix('.tmp')
+    df.write_ipc(tmp, compression='uncompressed')
+    tmp.replace(path)
+    return FrameHandle(path)
+
+
+def share_partitions(
+    df: _pl.DataFrame,
+    /,
+    by: str = 'insCode',
+    directory: _Path | str | None = None,
+) -> dict[str, FrameHandle]:
+    """Share each `by` group of df separately, keyed by its value."""
+    return {
+        key: share(part, directory)
+        for (key,), part in df.partition_by(by, as_dict=True).items()
+    }
+
+
+async def share_histories(
+    ins_codes: _Iterable[str],
+    /,
+    directory: _Path | str | None = None,
+    *,
+    limit: int = 99999,
+    concurrency: int = 8,
+) -> dict[str, FrameHandle]:
+    """Share Symbol.history of each of ins_codes as it is downloaded.
+
+    Only about concurrency histories are held in memory at any time.
+    """
+    ins_codes = [*ins_codes]
+
+    async def one(ins_code: str) -> FrameHandle:
+        lf = await _Symbol(ins_code).history(limit=limit)
+        return share(lf.collect(), directory)
+
+    handles = await _gather((one(c) for c in ins_codes), concurrency)
+    return dict(zip(ins_codes, handles, strict=True))
@@ -0,0 +1,75 @@
+"""Vectorized Gregorian to Jalali (Solar Hijri) conversion.
+
+Every function takes a Date or Datetime expression (e.g.
+``pl.col('transactionDate')``) and returns an expression, so the
+conversion runs inside Polars instead of calling jdatetime once per row.
+The results match jdatetime.date.fromgregorian.
+"""
+
+from __future__ import annotations as _
+
+import polars as _pl
+
+# the day number of 1970-01-01 in the arithmetic below
+_EPOCH_DAY = 1075195
+
+
+def date_parts(expr: _pl.Expr, /) -> _pl.Expr:
+    """Return a struct of Jalali year, month and day."""
+    days = expr.dt.date().cast(_pl.Int64) + _EPOCH_DAY
+    # 12053 days = 33 years, 1461 days = 4 years
+    year = -1595 + 33 * (days // 12053) + 4 * (days % 12053 // 1461)
+    days = days % 12053 % 1461
+    year = _pl.when(days > 365).then(year + (days - 1) // 365).otherwise(year)
+    days = _pl.when(days > 365).then((days - 1) % 365).otherwise(days)
+    first_half = days < 186
+    return _pl.struct(
+        year=year.cast(_pl.Int32),
+        month=_pl.when(first_half)
+        .then(1 + days // 31)
+        .otherwise(7 + (days - 186) // 30)
+        .cast(_pl.Int8),
+        day=_pl.when(first_half)
+        .then(1 + days % 31)
+        .otherwise(1 + (days - 186) % 30)
+        .cast(_pl.Int8),
+    )
+
+
+def year(expr: _pl.Expr, /) -> _pl.Expr:
+    return date_parts(expr).struct.field('year')
+
+
+def month(expr: _pl.Expr, /) -> _pl.Expr:
+    return date_parts(expr).struct.field('month')
+
+
+def day(expr: _pl.Expr, /) -> _pl.Expr:
+    return date_parts(expr).struct.field('day')
+
+
+def weekday(expr: _pl.Expr, /) -> _pl.Expr:
+    """Return the Persian weekday, 0 for Saturday and 6 for Friday."""
+    return ((expr.dt.weekday() + 1) % 7).cast(_pl.Int8)
+
+
+def month_start(expr: _pl.Expr, /) -> _pl.Expr:
+    """Return the Gregorian date of the first day of the Jalali month.
+
+    Useful for resampling on Jalali months, e.g.
+    ``lf.group_by('insCode', month_start(pl.col('transactionDate')))``.
+    """
+    return (expr.dt.date() - _pl.duration(days=day(expr) - 1)).name.suffix(
+        'MonthStart'
+    )
+
+
+def to_str(expr: _pl.Expr, /, separator: str = '/') -> _pl.Expr:
+    """Return Jalali dates formatted as YYYY/MM/DD."""
+    parts = date_parts(expr)
+    return _pl.concat_str(
+        parts.struct.field('year'),
+        parts.struct.field('month').cast(_pl.String).str.zfill(2),
+        parts.struct.field('day').cast(_pl.String).str.zfill(2),
+        separator=separator,
+    )
@@ -0,0 +1,150 @@
+"""A read-through caching proxy of the fipiran API for many workers.
+
+Run ``python -m fipiran.proxy --port 8080`` on one host and call
+``fipiran.use_proxy('http://host:8080')`` in each worker. Responses are
+cached for ttl seconds and concurrent identical requests share a single
+upstream call, so one upstream fetch serves all the workers.
+
+Besides /services/{path}, which mirrors the fipiran API, /arrow/{dataset}
+returns the datasets of fipiran.export.SNAPSHOTS as Arrow IPC streams;
+use read_frame to get them as frames.
+"""
+
+from __future__ import annotations as _
+
+from argparse import ArgumentParser as _ArgumentParser
+from asyncio import (
+    Task as _Task,
+    create_task as _create_task,
+    shield as _shield,
+)
+from collections.abc import Callable as _Callable, Coroutine as _Coroutine
+from io import BytesIO as _BytesIO
+from time import monotonic as _monotonic
+from typing import Any as _Any
+
+import polars as _pl
+from aiohttp import ClientResponseError as _ClientResponseError, web as _web
+
+from fipiran import _API, _read, session_manager
+from fipiran.export import SNAPSHOTS as _SNAPSHOTS
+
+
+class _Coalescer:
+    """Cache results of coroutine factories by key for ttl seconds.
+
+    Concurrent calls with the same key await the same task, which is not
+    cancelled if one of the callers is. Failures are not cached.
+    """
+
+    __slots__ = ('_cache', '_pending', 'ttl')
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._cache: dict[_Any, tuple[float, _Any]] = {}
+        self._pending: dict[_Any, _Task] = {}
+
+    async def get[T](
+        self, key, factory: _Callable[[], _Coroutine[_Any, _Any, T]]
+    ) -> T:
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > _monotonic():
+            return hit[1]
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = _create_task(factory())
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await _shield(task)
+
+    def _done(self, key, task: _Task):
+        del self._pending[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        now = _monotonic()
+        self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        self._cache[key] = (now + self.ttl, task.result())
+
+
+_COALESCER = _web.AppKey('coalescer', _Coalescer)
+
+
+async def _services(request: _web.Request) -> _web.Response:
+    path = request.match_info['path']
+    body = await request.read()
+    kwargs: dict = {'params': request.rel_url.query}
+    if body:
+        kwargs['data'] = body
+        kwargs['headers'] = {'Content-Type': request.content_type}
+    key = (request.method, path, request.query_string, body)
+    try:
+        content = await request.app[_COALESCER].get(
+            key, lambda: _read(_API + path, request.method, **kwargs)
+        )
+    except _ClientResponseError as e:
+        return _web.Response(status=e.status, text=e.message)
+    return _web.Response(body=content, content_type='application/json')
+
+
+async def _ipc(dataset: str) -> bytes:
+    df = (await _SNAPSHOTS[dataset]()).collect()
+    f = _BytesIO()
+    df.write_ipc_stream(f)
+    return f.getvalue()
+
+
+async def _arrow(request: _web.Request) -> _web.Response:
+    dataset = request.match_info['dataset']
+    if dataset not in _SNAPSHOTS:
+        raise _web.HTTPNotFound(text=f'unknown dataset: {dataset}')
+    try:
+        content = await request.app[_COALESCER].get(
+            ('arrow', dataset), lambda: _ipc(dataset)
+        )
+    except _ClientResponseError as e:
+        return _web.Response(status=e.status, text=e.message)
+    return _web.Response(
+        body=content, content_type='application/vnd.apache.arrow.stream'
+    )
+
+
+async def _close_session(_: _web.Application):
+    await session_manager.aclose()
+
+
+def app(ttl: float = 60.0) -> _web.Application:
+    """Return the proxy application, caching responses for ttl seconds."""
+    application = _web.Application()
+    application[_COALESCER] = _Coalescer(ttl)
+    application.router.add_route('*', '/services/{path:.*}', _services)
+    application.router.add_get('/arrow/{dataset}', _arrow)
+    application.on_cleanup.append(_close_session)
+    return application
+
+
+async def read_frame(url: str, dataset: str) -> _pl.LazyFrame:
+    """Return a dataset of the proxy running at url, see SNAPSHOTS."""
+    r = await session_manager.request(
+        'get', f'{url.rstrip("/")}/arrow/{dataset}'
+    )
+    return _pl.read_ipc_stream(await r.read()).lazy()
+
+
+def main(args=None):
+    parser = _ArgumentParser(
+        prog='python -m fipiran.proxy',
+        description='A read-through caching proxy of the fipiran API.',
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--ttl',
+        type=float,
+        default=60.0,
+        help='seconds for which responses are cached',
+    )
+    ns = parser.parse_args(args)
+    _web.run_app(app(ns.ttl), host=ns.host, port=ns.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""Lazy queries over symbols.search with server-side pushdown.
+
+SearchQuery records filter, sort and head calls like a LazyFrame and
+translates the ones that search supports into its parameters, so narrow
+queries download only the matching rows::
+
+    q = (
+        SearchQuery()
+        .filter(col('marketCode') == 1, col('type').is_in([300, 303]))
+        .sort('transactionValue', descending=True)
+        .head(10)
+    )
+    lf = await q.fetch()  # search(markettype=..., symboltype=..., limit=10)
+
+The queried frame is the instruments of search joined with their
+transactions on insCode. Every operation is also applied locally, in
+order, to the downloaded rows, so the result is the same whether or not
+an operation could be pushed down; see SearchQuery.params for the
+parameters that will be used. Sorts put nulls last, like the server does
+for descending sorts.
+"""
+
+from __future__ import annotations as _
+
+from functools import reduce as _reduce
+from operator import or_ as _or
+from typing import (
+    Any as _Any,
+    get_args as _get_args,
+    get_type_hints as _get_type_hints,
+)
+
+import polars as _pl
+from polars import col as _col
+
+from fipiran.symbols import (
+    CSVFlag as _CSVFlag,
+    MarketType as _MarketType,
+    SymbolStatus as _SymbolStatus,
+    SymbolType as _SymbolType,
+    search as _search,
+)
+
+# column: (search parameter, flag type or None for a single string)
+_FILTERS: dict[str, tuple[str, type[_CSVFlag] | None]] = {
+    'marketCode': ('markettype', _MarketType),
+    'type': ('symboltype', _SymbolType),
+    'symbolStatus': ('symbolstatus', _SymbolStatus),
+    'industryGroupCode': ('industry', None),
+    'industrySubCode': ('sub_industry', None),
+}
+_SORT_COLUMNS = frozenset(_get_args(_get_type_hints(_search)['column']))
+# the server collation of string columns differs from that of polars, and
+# its order of nulls (instruments without a transaction) is only known to
+# match nulls_last for descending sorts, so only these sorts can be
+# combined with a pushed-down limit
+_LIMIT_SORT_COLUMNS = _SORT_COLUMNS - {
+    'smallSymbolName',
+    'symbolFullName',
+    'transactionDate',
+}
+
+
+def _conjuncts(expr: _pl.Expr) -> list[_pl.Expr]:
+    """Split expr into the operands of its top-level & operators."""
+    inputs = expr.meta.pop()
+    if len(inputs) == 2:
+        right, left = inputs
+        if expr.meta.eq(left & right):
+            return _conjuncts(left) + _conjuncts(right)
+    return [expr]
+
+
+def _membership(expr: _pl.Expr) -> tuple[str, list] | None:
+    """Return (column, values) if expr is col == value or col.is_in(...)."""
+    inputs = expr.meta.pop()
+    if len(inputs) != 2:
+        return None
+    value, column = inputs
+    if not (column.meta.is_column() and value.meta.is_literal()):
+        return None
+    name = column.meta.output_name()
+    values = _pl.select(value).to_series()
+    if values.dtype == _pl.List:
+        values = values.explode()
+    values = values.to_list()
+    if len(values) == 1 and expr.meta.eq(_col(name) == values[0]):
+        return name, values
+    if expr.meta.eq(_col(name).is_in(values)):
+        return name, values
+    return None
+
+
+def _param(name: str, values: list) -> tuple[str, _Any] | None:
+    """Return the search parameter that selects exactly values of name."""
+    try:
+        param, flag_type = _FILTERS[name]
+    except KeyError:
+        return None
+    if flag_type is None:
+        if len(values) != 1 or not isinstance(values[0], str):
+            return None
+        return param, values[0]
+    codes = {code: flag for flag, code in flag_type.api_map.items()}
+    try:
+        flags = [codes[str(v)] for v in values]
+    except KeyError:
+        return None
+    if not flags:
+        return None
+    return param, _reduce(_or, flags)
+
+
+class SearchQuery:
+    """A lazy query over search results; see the module docstring.
+
+    Keyword arguments, e.g. idx_code or normalize, are passed to search
+    as they are.
+    """
+
+    __slots__ = ('_kwargs', '_ops')
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._ops: tuple[tuple[str, _Any], ...] = ()
+
+    def _then(self, op: str, arg: _Any) -> SearchQuery:
+        new = object.__new__(SearchQuery)
+        new._kwargs = self._kwargs
+        new._ops = (*self._ops, (op, arg))
+        return new
+
+    def filter(self, *predicates: _pl.Expr) -> SearchQuery:
+        return self._then('filter', _reduce(_pl.Expr.and_, predicates))
+
+    def sort(self, by: str, *, descending: bool = False) -> SearchQuery:
+        return self._then('sort', (by, descending))
+
+    def head(self, n: int = 5) -> SearchQuery:
+        return self._then('head', n)
+
+    def params(self) -> dict[str, _Any]:
+        """Return the keyword arguments that fetch will pass to search.
+
+        Filters and sorts before the first head are pushed down when
+        possible. head is pushed down as limit only if everything before
+        it was pushed down and there was either no sort or one descending
+        sort by a numeric column.
+        """
+        params = dict(self._kwargs)
+        exact = True  # the server returns exactly the rows so far
+        limit_sort = True  # the server order matches the local one
+        sorts = 0
+        for op, arg in self._ops:
+            if op == 'filter':
+                for expr in _conjuncts(arg):
+                    membership = _membership(expr)
+                    pushed = membership and _param(*membership)
+                    if pushed and pushed[0] not in params:
+                        params[pushed[0]] = pushed[1]
+                    else:
+                        exact = False
+            elif op == 'sort':
+                by, descending = arg
+                sorts += 1
+                limit_sort = descending and by in _LIMIT_SORT_COLUMNS
+                if by in _SORT_COLUMNS:
+                    params['column'] = by
+                    params['sort'] = 'desc' if descending else 'asc'
+                else:
+                    exact = False
+            else:  # head
+                if exact and sorts <= 1 and limit_sort:
+                    params['limit'] = arg
+                break
+        return params
+
+    async def fetch(self) -> _pl.LazyFrame:
+        """Run search with the pushed-down parameters and return the result."""
+        instruments, transactions = await _search(**self.params())
+        lf = instruments.join(transactions, on='insCode', how='left')
+        for op, arg in self._ops:
+            if op == 'filter':
+                lf = lf.filter(arg)
+            elif op == 'sort':
+                by, descending = arg
+                lf = lf.sort(
+                    by,
+                    descending=descending,
+                    nulls_last=True,
+                    maintain_order=True,
+                )
+            else:
+                lf = lf.head(arg)
+        return lf
@@ -0,0 +1,150 @@
+"""Run CPU-heavy per-symbol work in a process pool.
+
+The event loop of the calling process does the I/O: it downloads the
+frames concurrently (from the response cache, if fipiran.set_cache is
+used) and hands each one to a worker process as soon as it arrives, using
+fipiran.ipc handles, so downloads and computation overlap. Results are
+handed back the same way and concatenated into one frame.
+
+func must be picklable, i.e. a module level function, for example
+symbols.adjust_history or a function of your own module.
+"""
+
+from __future__ import annotations as _
+
+from asyncio import (
+    Semaphore as _Semaphore,
+    gather as _agather,
+    get_running_loop as _get_running_loop,
+)
+from collections.abc import (
+    Awaitable as _Awaitable,
+    Callable as _Callable,
+    Iterable as _Iterable,
+)
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from multiprocessing import get_context as _get_context
+from os import cpu_count as _cpu_count
+from pathlib import Path as _Path
+
+import polars as _pl
+
+from fipiran.ipc import FrameHandle as _FrameHandle, share as _share
+from fipiran.symbols import Symbol as _Symbol, search as _search
+
+_Func = _Callable[[_pl.LazyFrame], _pl.LazyFrame | _pl.DataFrame]
+
+
+def _apply(
+    func: _Func, handle: _FrameHandle, directory: str | None
+) -> _FrameHandle:
+    """Apply func to a shared frame in a worker and share the result."""
+    with handle:
+        result = func(handle.scan())
+        if isinstance(result, _pl.LazyFrame):
+            result = result.collect()
+        return _share(result, directory)
+
+
+async def map_frames(
+    func: _Func,
+    aws: _Iterable[_Awaitable[_pl.LazyFrame | _pl.DataFrame]],
+    /,
+    *,
+    processes: int | None = None,
+    concurrency: int = 8,
+    directory: _Path | str | None = None,
+) -> _pl.LazyFrame:
+    """Await frames concurrently and apply func to each in a process pool.
+
+    At most concurrency awaitables run at the same time, and at most
+    2 * processes shared frames wait for a worker, which bounds the memory
+    use; a downloaded frame waits in memory, holding its concurrency slot,
+    until it can be shared. The results are concatenated in the order of aws.
+
+    If any awaitable or func raises, the other ones are still completed,
+    all the shared files are removed and the first error is raised.
+    """
+    processes = processes or _cpu_count() or 1
+    directory = None if directory is None else str(directory)
+    loop = _get_running_loop()
+    fetching = _Semaphore(concurrency)
+    # frames being processed or waiting for a worker
+    sharing = _Semaphore(3 * processes)
+    results: list[_FrameHandle] = []
+
+    with _ProcessPoolExecutor(
+        processes, mp_context=_get_context('spawn')
+    ) as executor:
+
+        async def one(
+            aw: _Awaitable[_pl.LazyFrame | _pl.DataFrame],
+        ) -> _FrameHandle:
+            handle = None
+            async with fetching:
+                frame = await aw
+                if isinstance(frame, _pl.LazyFrame):
+                    frame = frame.collect()
+                await sharing.acquire()
+            try:
+                handle = _share(frame, directory)
+                del frame
+                result = await loop.run_in_executor(
+                    executor, _apply, func, handle, directory
+                )
+            finally:
+                sharing.release()
+                # normally already removed by the worker
+                if handle is not None:
+                    handle.unlink()
+            results.append(result)
+            return result
+
+        try:
+            # every task is finished before the executor is shut down
+            handles = await _agather(
+                *[one(aw) for aw in aws], return_exceptions=True
+            )
+        except BaseException:
+            for h in results:
+                h.unlink()
+            raise
+
+    try:
+        for h in handles:
+            if isinstance(h, BaseException):
+                raise h
+        df = _pl.concat(
+            [h.read() for h in handles if isinstance(h, _FrameHandle)],
+            how='diagonal_relaxed',
+        ).rechunk()
+    finally:
+        for h in results:
+            h.unlink()
+    return df.lazy()
+
+
+async def map_histories(
+    func: _Func,
+    ins_codes: _Iterable[str] | None = None,
+    /,
+    *,
+    limit: int = 99999,
+    processes: int | None = None,
+    concurrency: int = 8,
+    directory: _Path | str | None = None,
+) -> _pl.LazyFrame:
+    """Apply func to Symbol.history of each of ins_codes using map_frames.
+
+    ins_codes defaults to all the symbols returned by search.
+    """
+    if ins_codes is None:
+        instruments, _ = await _search()
+        ins_codes = instruments.select('insCode').collect()['insCode']
+    return await map_frames(
+        func,
+        (_Symbol(c).history(limit=limit) for c in ins_codes),
+        processes=processes,
+        concurrency=concurrency,
+        directory=directory,
+    )
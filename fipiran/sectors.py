@@ -0,0 +1,215 @@
+"""Industry hierarchy and sector aggregates of search snapshots.
+
+IndustryTree holds the industry groups and sub-industries of
+symbols.industries and symbols.sub_industries as interned codes with
+their titles and the parent/child mapping precomputed.
+
+SectorAggregates keeps per sub-industry sums (value traded, volume,
+market breadth and the sum of price changes) of successive search
+snapshots. Each update only subtracts the old and adds the new
+contribution of the symbols whose row has changed, so sector figures are
+never recomputed from the whole market. A snapshot may cover part of the
+market, e.g. ``search(industry='44')``; the other symbols keep their last
+values.
+"""
+
+from __future__ import annotations as _
+
+from asyncio import gather as _agather
+from sys import intern as _intern
+
+import polars as _pl
+from polars import col as _col
+
+from fipiran.symbols import (
+    industries as _industries,
+    sub_industries as _sub_industries,
+)
+
+_KEYS = ['industryGroupCode', 'industrySubCode']
+_SYMBOLS_SCHEMA = {
+    'insCode': _pl.String,
+    'industryGroupCode': _pl.String,
+    'industrySubCode': _pl.String,
+    'transactionValue': _pl.Int64,
+    'numberOfVolume': _pl.Int64,
+    'change': _pl.Float64,
+}
+_SUMS = [
+    'symbols',
+    'transactionValue',
+    'numberOfVolume',
+    'advancing',
+    'declining',
+    'unchanged',
+    'changeSum',
+]
+
+
+def _code(code: str) -> str:
+    # industryGroupCode values are padded, e.g. '44 '
+    return _intern(code.strip())
+
+
+class IndustryTree:
+    """Industry groups and their sub-industries."""
+
+    __slots__ = ('children', 'parent', 'titles')
+
+    def __init__(
+        self, industries: _pl.DataFrame, sub_industries: _pl.DataFrame
+    ):
+        self.titles: dict[str, str] = {}
+        self.parent: dict[str, str] = {}
+        children: dict[str, list[str]] = {}
+        for code, title in industries.select(
+            'industryGroupCode', 'title'
+        ).iter_rows():
+            code = _code(code)
+            self.titles[code] = title
+            children[code] = []
+        for code, title, group in sub_industries.select(
+            'industrySubCode', 'title', 'industryGroupCode'
+        ).iter_rows():
+            code, group = _code(code), _code(group)
+            self.titles[code] = title
+            self.parent[code] = group
+            children.setdefault(group, []).append(code)
+        self.children: dict[str, tuple[str, ...]] = {
+            k: tuple(v) for k, v in children.items()
+        }
+
+    @classmethod
+    async def fetch(cls) -> IndustryTree:
+        industries, sub_industries = await _agather(
+            _industries(), _sub_industries()
+        )
+        return cls(industries.collect(), sub_industries.collect())
+
+    def __repr__(self):
+        return (
+            f'<{type(self).__name__} of {len(self.children)} industries, '
+            f'{len(self.parent)} sub-industries>'
+        )
+
+    def __contains__(self, code: str) -> bool:
+        return code.strip() in self.titles
+
+    def group(self, code: str) -> str:
+        """Return the industry group code of a group or sub-industry code."""
+        code = code.strip()
+        if code in self.children:
+            return code
+        return self.parent[code]
+
+    def frame(self) -> _pl.LazyFrame:
+        """Return the sub-industries with their group codes and titles."""
+        return _pl.LazyFrame(
+            {
+                'industryGroupCode': [*self.parent.values()],
+                'industryGroupTitle': [
+                    self.titles[g] for g in self.parent.values()
+                ],
+                'industrySubCode': [*self.parent],
+                'industrySubTitle': [self.titles[s] for s in self.parent],
+            }
+        )
+
+
+def _contributions(symbols: _pl.DataFrame, sign: int) -> _pl.DataFrame:
+    return symbols.select(
+        *_KEYS,
+        symbols=_pl.lit(sign, _pl.Int64),
+        transactionValue=_col('transactionValue') * sign,
+        numberOfVolume=_col('numberOfVolume') * sign,
+        advancing=(_col('change') > 0).cast(_pl.Int64) * sign,
+        declining=(_col('change') < 0).cast(_pl.Int64) * sign,
+        unchanged=(_col('change') == 0).cast(_pl.Int64) * sign,
+        changeSum=_col('change') * sign,
+    )
+
+
+class SectorAggregates:
+    """Sector aggregates maintained incrementally from search snapshots.
+
+    change is the percentage change of closingPrice from priceYesterday.
+    """
+
+    __slots__ = ('_sums', '_symbols')
+
+    def __init__(self):
+        self._symbols = _pl.DataFrame(schema=_SYMBOLS_SCHEMA)
+        self._sums = _contributions(self._symbols, 1)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} of {len(self._symbols)} symbols>'
+
+    def update(
+        self, instruments: _pl.LazyFrame, transactions: _pl.LazyFrame
+    ) -> int:
+        """Apply a snapshot returned by search and return the changed count.
+
+        Symbols without a transaction row or without an industry are
+        ignored.
+        """
+        rows = (
+            instruments.select(
+                'insCode',
+                *[_col(k).str.strip_chars() for k in _KEYS],
+            )
+            .join(
+                transactions.select(
+                    'insCode',
+                    _col('transactionValue').cast(_pl.Int64),
+                    _col('numberOfVolume').cast(_pl.Int64),
+                    change=_pl.when(_col('priceYesterday') != 0)
+                    .then(
+                        (_col('closingPrice') / _col('priceYesterday') - 1)
+                        * 100
+                    )
+                    .otherwise(0.0),
+                ),
+                on='insCode',
+            )
+            .drop_nulls(_KEYS)
+            .unique('insCode', keep='last')
+            .collect()
+            .cast(_SYMBOLS_SCHEMA)  # type: ignore
+        )
+        changed = rows.join(self._symbols, on=[*_SYMBOLS_SCHEMA], how='anti')
+        if changed.is_empty():
+            return 0
+        old = self._symbols.join(changed, on='insCode', how='semi')
+        delta = (
+            _pl.concat([_contributions(old, -1), _contributions(changed, 1)])
+            .group_by(_KEYS)
+            .sum()
+        )
+        self._sums = (
+            _pl.concat([self._sums, delta])
+            .group_by(_KEYS)
+            .sum()
+            .filter(_col('symbols') > 0)
+        )
+        self._symbols = _pl.concat(
+            [self._symbols.join(changed, on='insCode', how='anti'), changed]
+        )
+        return len(changed)
+
+    def sub_industries(self) -> _pl.LazyFrame:
+        """Return the aggregates of each sub-industry."""
+        return self._with_average(self._sums.lazy()).sort(_KEYS)
+
+    def industries(self) -> _pl.LazyFrame:
+        """Return the aggregates of each industry group."""
+        return self._with_average(
+            self._sums.lazy()
+            .group_by('industryGroupCode')
+            .agg(_col(_SUMS).sum())
+        ).sort('industryGroupCode')
+
+    @staticmethod
+    def _with_average(lf: _pl.LazyFrame) -> _pl.LazyFrame:
+        return lf.with_columns(
+            averageChange=_col('changeSum') / _col('symbols')
+        )
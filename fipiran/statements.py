@@ -0,0 +1,356 @@
+"""Bulk tools for Codal statements returned by Symbol.statements."""
+
+from __future__ import annotations as _
+
+from asyncio import sleep as _sleep
+from collections.abc import (
+    AsyncIterator as _AsyncIterator,
+    Iterable as _Iterable,
+)
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from datetime import datetime as _datetime
+from hashlib import sha1 as _sha1, sha256 as _sha256
+from multiprocessing import get_context as _get_context
+from pathlib import Path as _Path
+from time import monotonic as _monotonic
+
+import polars as _pl
+from aiohttp import ClientResponseError as _ClientResponseError
+
+from fipiran import _gather, session_manager
+from fipiran._html import html_tables as _html_tables
+from fipiran.symbols import Statement, Symbol
+
+# Statement url fields and the file extension used when the server does
+# not provide a file name
+_URL_KINDS = {
+    'pdfUrl': '.pdf',
+    'excelUrl': '.xls',
+    'htmlUrl': '.html',
+    'attachmentUrl': '.html',
+}
+
+_MANIFEST_SCHEMA = {
+    'insCode': _pl.String,
+    'title': _pl.String,
+    'publishDateTime': _pl.Datetime('us'),
+    'kind': _pl.String,
+    'url': _pl.String,
+    'sha256': _pl.String,
+    'path': _pl.String,
+}
+
+
+async def _download(
+    url: str, directory: _Path, suffix: str, chunk_size: int
+) -> tuple[str, _Path]:
+    """Download url into directory and return its (sha256, path).
+
+    The file is streamed to a .part file first, which is resumed using a
+    Range request if it already exists, and is then renamed to its content
+    hash. If a file with the same hash exists, the new one is discarded.
+    """
+    part = directory / f'{_sha1(url.encode()).hexdigest()}.part'
+    h = _sha256()
+    headers = {}
+    if part.exists():
+        with part.open('rb') as f:
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+        headers['Range'] = f'bytes={part.stat().st_size}-'
+    try:
+        resp = await session_manager.request('get', url, headers=headers)
+    except _ClientResponseError as e:
+        if e.status != 416:  # 416 means .part is already complete
+            raise
+    else:
+        try:
+            if resp.status != 206:  # the server ignored the Range header
+                h = _sha256()
+            cd = resp.content_disposition
+            if cd is not None and cd.filename:
+                suffix = _Path(cd.filename).suffix
+            with part.open('ab' if resp.status == 206 else 'wb') as f:
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    f.write(chunk)
+                    h.update(chunk)
+        finally:
+            resp.release()
+    digest = h.hexdigest()
+    path = directory / f'{digest}{suffix}'
+    if path.exists():
+        part.unlink()
+    else:
+        part.replace(path)
+    return digest, path
+
+
+async def download_statements(
+    statements: _Iterable[tuple[str, Statement]],
+    directory: _Path | str,
+    *,
+    kinds: _Iterable[str] = ('pdfUrl', 'excelUrl', 'attachmentUrl'),
+    attachments: bool = True,
+    concurrency: int = 4,
+    chunk_size: int = 1 << 16,
+) -> _pl.LazyFrame:
+    """Download the files of statements into directory.
+
+    statements are (insCode, Statement) pairs, e.g. from Symbol.statements.
+    kinds are the url fields of Statement to download and attachments
+    controls downloading Statement.attachments.
+
+    Files are stored by their sha256 so identical files are saved only
+    once, and partial downloads are resumed. A manifest linking insCode,
+    title, publishDateTime and url to the stored path is saved in
+    directory/manifest.parquet and returned; urls already in the manifest
+    are not downloaded again.
+
+    If some downloads fail, the manifest is still saved with the
+    successful ones before the first error is raised, so a rerun only
+    downloads the failed urls.
+    """
+    directory = _Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path = directory / 'manifest.parquet'
+    if manifest_path.exists():
+        old = _pl.read_parquet(manifest_path)
+    else:
+        old = _pl.DataFrame(schema=_MANIFEST_SCHEMA)
+    done = {
+        url
+        for url, path in old.select('url', 'path').iter_rows()
+        if _Path(path).exists()
+    }
+
+    jobs = []
+    for ins_code, s in statements:
+        urls = [(kind, getattr(s, kind), _URL_KINDS[kind]) for kind in kinds]
+        if attachments:
+            urls += [('attachment', a.url, '') for a in s.attachments]
+        jobs += [
+            (ins_code, s.title, s.publishDateTime, kind, url, suffix)
+            for kind, url, suffix in urls
+            if url and url not in done
+        ]
+        done.update(url for _, url, _ in urls)
+
+    async def one(job: tuple) -> tuple[str, _Path] | Exception:
+        try:
+            return await _download(job[4], directory, job[5], chunk_size)
+        except Exception as e:
+            return e
+
+    results = await _gather(map(one, jobs), concurrency)
+    new = _pl.DataFrame(
+        [
+            (*job[:5], result[0], str(result[1]))
+            for job, result in zip(jobs, results, strict=True)
+            if not isinstance(result, Exception)
+        ],
+        schema=_MANIFEST_SCHEMA,
+        orient='row',
+    )
+    manifest = _pl.concat([old, new]).unique('url', keep='last')
+    tmp = manifest_path.with_suffix('.tmp')
+    manifest.write_parquet(tmp)
+    tmp.replace(manifest_path)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return manifest.lazy()
+
+
+class StatementsWatcher:
+    """Poll statements of many symbols and report only the new ones.
+
+    For each insCode the publishDateTime of the latest seen statement is
+    kept in last_seen. Polling fetches small pages and stops at the first
+    already seen statement. A symbol without a last_seen entry is only
+    used to set it on its first poll, no statements are reported for it.
+
+    Polling intervals adapt to filing activity: the interval of a symbol is
+    halved (down to min_interval) when it has new statements and doubled
+    (up to max_interval) otherwise.
+
+    A symbol whose poll fails keeps its last_seen, so its statements are
+    reported by a later poll, and its interval is doubled as if it had no
+    new statements. The errors of the latest poll are kept in errors.
+    """
+
+    __slots__ = (
+        '_due',
+        'concurrency',
+        'errors',
+        'intervals',
+        'last_seen',
+        'max_interval',
+        'min_interval',
+        'page_size',
+    )
+
+    def __init__(
+        self,
+        ins_codes: _Iterable[str],
+        *,
+        last_seen: dict[str, _datetime] | None = None,
+        page_size: int = 5,
+        min_interval: float = 60.0,
+        max_interval: float = 3600.0,
+        concurrency: int = 4,
+    ):
+        self.last_seen = {} if last_seen is None else last_seen
+        self.page_size = page_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.concurrency = concurrency
+        self.intervals = dict.fromkeys(ins_codes, min_interval)
+        self._due = dict.fromkeys(self.intervals, 0.0)
+        self.errors: dict[str, Exception] = {}
+
+    def _schedule(self, ins_code: str, active: bool) -> None:
+        interval = self.intervals[ins_code]
+        if active:
+            interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * 2)
+        self.intervals[ins_code] = interval
+        self._due[ins_code] = _monotonic() + interval
+
+    async def _poll(self, ins_code: str) -> list[Statement] | Exception:
+        last = self.last_seen.get(ins_code)
+        symbol = Symbol(ins_code)
+        new: list[Statement] = []
+        page = 0
+        try:
+            while True:
+                items = await symbol.statements(self.page_size, page=page)
+                fresh = [
+                    s
+                    for s in items
+                    if last is None or s.publishDateTime > last
+                ]
+                new += fresh
+                # a page with seen statements means the rest are seen, too
+                if last is None or len(fresh) < self.page_size:
+                    break
+                page += 1
+        except Exception as e:
+            self._schedule(ins_code, False)
+            return e
+
+        if new:
+            self.last_seen[ins_code] = max(s.publishDateTime for s in new)
+        self._schedule(ins_code, last is not None and bool(new))
+        if last is None:
+            return []
+        new.reverse()
+        return new
+
+    async def poll(self) -> list[tuple[str, Statement]]:
+        """Poll the symbols that are due and return new statements.
+
+        Statements are returned as (insCode, Statement) pairs, oldest first
+        for each symbol. Symbols whose poll failed are left out and their
+        errors replace errors.
+        """
+        now = _monotonic()
+        due = [c for c, t in self._due.items() if t <= now]
+        results = await _gather((self._poll(c) for c in due), self.concurrency)
+        self.errors = {
+            c: r
+            for c, r in zip(due, results, strict=True)
+            if isinstance(r, Exception)
+        }
+        return [
+            (c, s)
+            for c, new in zip(due, results, strict=True)
+            if not isinstance(new, Exception)
+            for s in new
+        ]
+
+    async def watch(self) -> _AsyncIterator[tuple[str, Statement]]:
+        """Yield new (insCode, Statement) pairs as they are published.
+
+        Failed polls do not stop watching; see errors.
+        """
+        while True:
+            for item in await self.poll():
+                yield item
+            await _sleep(max(0.0, min(self._due.values()) - _monotonic()))
+
+
+# identifier columns of exported statement files and their canonical names
+_ID_COLUMNS = {
+    'symbol': 'symbol',
+    'lval18afc': 'symbol',
+    'name': 'symbol',
+    'publishdate': 'publishDate',
+    'financeyear': 'financeYear',
+    'financialyear': 'financeYear',
+    'year': 'year',
+    'period': 'period',
+    'priod': 'period',
+    'isaudit': 'isAudit',
+    'pdate': 'jDate',
+    'dateissue': 'jDate',
+    'gdate': 'date',
+}
+
+_ID_DTYPES = {
+    'year': _pl.Int32,
+    'period': _pl.Int32,
+    'isAudit': _pl.Boolean,
+    'date': _pl.Date,
+}
+
+
+def parse_statement_file(path: _Path | str) -> _pl.DataFrame:
+    """Parse an exported statement file into a long frame.
+
+    Supports the HTML-based .xls files of Statement.excelUrl (balance
+    sheet, income statement, financial ratios) and the .xls.html exports of
+    fipiran. The result has the identifier columns of the file (symbol,
+    publishDate, financeYear, year, period, ...) followed by item, value
+    and file columns.
+    """
+    content = _Path(path).read_bytes()
+    if content.startswith(b'\xd0\xcf\x11\xe0'):
+        raise ValueError(f'{path} is a binary .xls file, not supported')
+    df = _html_tables(content)[0]
+    df = df.rename(
+        {
+            c: _ID_COLUMNS[k]
+            for c in df.columns
+            if (k := c.lower()) in _ID_COLUMNS
+        }
+    )
+    ids = [c for c in df.columns if c in _ID_COLUMNS.values()]
+    return (
+        df.with_columns(_pl.all().replace('', None))
+        .unpivot(index=ids, variable_name='item', value_name='value')
+        .with_columns(
+            *[
+                _pl.col(c).str.to_date('%Y%m%d')
+                if dtype is _pl.Date
+                else _pl.col(c) == 'true'
+                if dtype is _pl.Boolean
+                else _pl.col(c).cast(dtype)
+                for c, dtype in _ID_DTYPES.items()
+                if c in ids
+            ],
+            _pl.col('value').cast(_pl.Float64, strict=False),
+            file=_pl.lit(str(path)),
+        )
+    )
+
+
+def parse_statement_files(
+    paths: _Iterable[_Path | str], /, *, processes: int | None = None
+) -> _pl.LazyFrame:
+    """Parse many files using parse_statement_file in a process pool."""
+    with _ProcessPoolExecutor(
+        processes, mp_context=_get_context('spawn')
+    ) as executor:
+        dfs = [*executor.map(parse_statement_file, paths, chunksize=8)]
+    return _pl.concat(dfs, how='diagonal_relaxed').lazy()
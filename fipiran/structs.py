@@ -0,0 +1,82 @@
+"""Lightweight slotted dataclass versions of the response models.
+
+struct_type generates a slotted dataclass with the fields of a model (and
+of the models nested in it) once per model. validate_json parses a
+response directly into these classes using a cached TypeAdapter, so the
+objects have no per-instance __dict__, extra-fields dict or fields-set
+bookkeeping of pydantic models, and missing fields are simply None.
+Unknown fields of the response are dropped.
+
+Methods that return single objects accept ``struct=True`` to use these
+classes, e.g. ``await Symbol(...).info(struct=True)``.
+"""
+
+from __future__ import annotations as _
+
+from dataclasses import field as _field, make_dataclass as _make_dataclass
+from functools import cache as _cache, reduce as _reduce
+from operator import or_ as _or
+from types import UnionType as _UnionType
+from typing import (
+    Annotated as _Annotated,
+    Any as _Any,
+    Union as _Union,
+    get_args as _get_args,
+    get_origin as _get_origin,
+)
+
+from pydantic import (
+    BaseModel as _BaseModel,
+    RootModel as _RootModel,
+    TypeAdapter as _TypeAdapter,
+)
+
+
+def _convert(tp: _Any) -> _Any:
+    """Return tp with all the models in it replaced by struct types."""
+    if isinstance(tp, type) and issubclass(tp, _BaseModel):
+        return struct_type(tp)
+    args = _get_args(tp)
+    if not args:
+        return tp
+    origin = _get_origin(tp)
+    if origin is _Annotated:
+        return _Annotated[(_convert(args[0]), *tp.__metadata__)]
+    new_args = tuple(_convert(a) for a in args)
+    if new_args == args or origin is None:
+        return tp
+    if origin is _UnionType or origin is _Union:
+        return _reduce(_or, new_args)
+    return origin[new_args]
+
+
+@_cache
+def struct_type(model: type[_BaseModel]) -> _Any:
+    """Return a slotted dataclass with the same fields as model.
+
+    All fields default to None. For a RootModel the converted type of its
+    root is returned, e.g. ``list[struct_type(Item)]``.
+    """
+    # resolve forward references of models that are not built yet
+    model.model_rebuild()
+    if issubclass(model, _RootModel):
+        return _convert(model.model_fields['root'].annotation)
+    return _make_dataclass(
+        model.__name__,
+        [
+            (name, _convert(info.annotation), _field(default=None))
+            for name, info in model.model_fields.items()
+        ],
+        kw_only=True,
+        slots=True,
+    )
+
+
+@_cache
+def _adapter(model: type[_BaseModel]) -> _TypeAdapter:
+    return _TypeAdapter(struct_type(model))
+
+
+def validate_json(model: type[_BaseModel], data: bytes | str) -> _Any:
+    """Parse data into an instance of struct_type(model)."""
+    return _adapter(model).validate_json(data)
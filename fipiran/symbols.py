@@ -1,14 +1,17 @@
 from __future__ import annotations as _
 
+from collections.abc import Iterable as _Iterable
 from datetime import datetime as _datetime
 from enum import Flag as _Flag, auto as _auto
-from typing import Literal as _Literal
+from typing import Any as _Any, Literal as _Literal, overload as _overload
 
 import polars as _pl
 from polars import col as _col
 from pydantic import RootModel as _RootModel
 
-from fipiran import _api, _LooseModel
+from fipiran import _api, _api_struct, _gather, _LooseModel
+from fipiran._codeset import CodeSet as _CodeSet
+from fipiran.text import normalize_strings as _normalize_strings
 
 
 class _InstrumentInfo(_LooseModel):
@@ -196,9 +199,25 @@ class Symbol:
     def __eq__(self, other):
         return isinstance(other, Symbol) and other.ins_code == self.ins_code
 
-    async def info(self) -> InstrumentInfo:
+    def __hash__(self):
+        return hash(self.ins_code)
+
+    @_overload
+    async def info(
+        self, *, struct: _Literal[False] = False
+    ) -> InstrumentInfo: ...
+
+    @_overload
+    async def info(self, *, struct: _Literal[True]) -> _Any: ...
+
+    async def info(self, *, struct: bool = False) -> _Any:
+        """Return instrument info.
+
+        If struct is True, a lightweight structs.struct_type(InstrumentInfo)
+        object is returned instead.
+        """
         return (
-            await _api(
+            await (_api_struct if struct else _api)(
                 'instrument/getinstrument',
                 model=_InstrumentInfo,
                 params={'insCode': self.ins_code},
@@ -243,14 +262,17 @@ class Symbol:
             (vars(i) for i in items), infer_schema_length=None
         )
 
-    async def statements(self, limit: int = 100) -> list[Statement]:
+    async def statements(
+        self, limit: int = 100, *, page: int = 0
+    ) -> list[Statement]:
+        """Return statements, latest first, in pages of size limit."""
         return (
             await _api(
                 'codal/statements',
                 params={
                     'insCode': self.ins_code,
                     'pageSize': limit,
-                    'pageIndex': 0,
+                    'pageIndex': page,
                 },
                 model=_Statements,
             )
@@ -270,15 +292,66 @@ class Symbol:
         return Symbol(df.item(0, 0))
 
 
+_ADJUSTED_PRICES = (
+    'priceFirst',
+    'priceMin',
+    'priceMax',
+    'lastTransaction',
+    'closingPrice',
+    'priceYesterday',
+)
+
+
+def adjust_history(
+    lf: _pl.LazyFrame, /, *, forward: bool = False
+) -> _pl.LazyFrame:
+    """Return lf with adjusted prices and volume, sorted by date.
+
+    lf should be the result of Symbol.history or a concatenation of several
+    of them. Adjustment factors are derived from the gap between
+    priceYesterday of each session and closingPrice of the previous session
+    of the same insCode and are added as the adjustmentFactor column.
+
+    Backward adjustment (the default) keeps the latest prices intact and
+    scales older ones, forward adjustment keeps the oldest prices intact and
+    scales newer ones.
+    """
+    prev_close = _col('closingPrice').shift(1).over('insCode')
+    # capital raises and dividends only ever lower the reference price,
+    # upward gaps are noise in the recorded data and are ignored
+    gap = (
+        _pl.when(_col('priceYesterday') < prev_close)
+        .then(_col('priceYesterday') / prev_close)
+        .fill_null(1.0)
+    )
+    if forward:
+        factor = 1.0 / _col('gap').cum_prod().over('insCode')
+    else:
+        factor = (
+            _col('gap')
+            .cum_prod(reverse=True)
+            .shift(-1, fill_value=1.0)
+            .over('insCode')
+        )
+    return (
+        lf.sort('insCode', 'transactionDate')
+        .with_columns(gap=gap)
+        .with_columns(adjustmentFactor=factor)
+        .with_columns(
+            _col(_ADJUSTED_PRICES) * _col('adjustmentFactor'),
+            _col('numberOfVolume') / _col('adjustmentFactor'),
+        )
+        .drop('gap')
+    )
+
+
 class CSVFlag(_Flag):
     api_map: dict
 
     def __str__(self) -> str:
         """Return a CSV representation of the chosen flags."""
-        cls = type(self)
-        if cls.ALL in self:  # type: ignore
-            return ''
-        return ','.join([cls.api_map[flag.name] for flag in self])
+        api_map = type(self).api_map
+        return ','.join([api_map[flag] for flag in self])
 
 
 class MarketType(CSVFlag):
@@ -407,9 +480,12 @@ async def search(
         'priceMin',
         'priceMax',
     ] = 'smallSymbolName',
+    normalize: bool = False,
 ) -> tuple[_pl.LazyFrame, _pl.LazyFrame]:
     """https://www.fipiran.com/symbol/list.
 
+    normalize applies text.normalize_strings to both frames.
+
     Use the following functions for finding the appropriate
     code for the following parameters:
         industry: symbols.industries
@@ -427,11 +503,11 @@ async def search(
     if idx_code is not None:
         params['idx_code'] = idx_code
     if symboltype is not None:
-        params['symboltype'] = symboltype
+        params['symboltype'] = str(symboltype)
     if symbolstatus is not None:
-        params['symbolstatus'] = symbolstatus
+        params['symbolstatus'] = str(symbolstatus)
     if markettype is not None:
-        params['markettype'] = markettype
+        params['markettype'] = str(markettype)
     if company is not None:
         params['company'] = company
     if sub_industry is not None:
@@ -451,6 +527,11 @@ async def search(
         (vars(i) for i in r.instrumentTransactions), infer_schema_length=None
     )
 
+    if normalize:
+        return (
+            _normalize_strings(instruments_lf),
+            _normalize_strings(transactions_lf),
+        )
     return (instruments_lf, transactions_lf)
 
 
@@ -495,11 +576,18 @@ class _IndexCompare(_LooseModel):
     items: list[IndexData]
 
 
-async def index_compare() -> _pl.LazyFrame:
+async def index_compare(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See symbols.IndexData for column names.
+
+    normalize applies text.normalize_strings to the result.
+    """
     m = await _api('index/indexcompare', model=_IndexCompare)
     items = m.items
     assert m.totalCount <= len(items)
-    return _pl.LazyFrame((vars(i) for i in items), infer_schema_length=None)
+    lf = _pl.LazyFrame((vars(i) for i in items), infer_schema_length=None)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class Industry(_LooseModel):
@@ -507,11 +595,19 @@ class Industry(_LooseModel):
     title: str
 
 
-async def industries() -> _pl.LazyFrame:
-    res = await _api(
-        'instrument/getindustry', model=_RootModel[list[Industry]]
-    )
-    return _pl.LazyFrame((vars(i) for i in res.root), infer_schema_length=None)
+_Industries = _RootModel[list[Industry]]
+
+
+async def industries(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See symbols.Industry for column names.
+
+    normalize applies text.normalize_strings to the result.
+    """
+    res = await _api('instrument/getindustry', model=_Industries)
+    lf = _pl.LazyFrame((vars(i) for i in res.root), infer_schema_length=None)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
 
 
 class SubIndustry(_LooseModel):
@@ -521,8 +617,104 @@ class SubIndustry(_LooseModel):
     date: _datetime
 
 
-async def sub_industries() -> _pl.LazyFrame:
-    res = await _api(
-        'instrument/getindustrysub', model=_RootModel[list[SubIndustry]]
+_SubIndustries = _RootModel[list[SubIndustry]]
+
+
+async def sub_industries(*, normalize: bool = False) -> _pl.LazyFrame:
+    """See symbols.SubIndustry for column names.
+
+    normalize applies text.normalize_strings to the result.
+    """
+    res = await _api('instrument/getindustrysub', model=_SubIndustries)
+    lf = _pl.LazyFrame((vars(i) for i in res.root), infer_schema_length=None)
+    if normalize:
+        return _normalize_strings(lf)
+    return lf
+
+
+async def client_types(
+    ins_codes: _Iterable[str], /, *, concurrency: int = 8
+) -> _pl.LazyFrame:
+    """Return client type (individual/institutional) data of ins_codes.
+
+    Each row also carries insCode, transactionDate and closingPrice of the
+    instrument. See symbols.InstrumentClientType for other column names and
+    use symbols.client_type_metrics for derived columns.
+    """
+    infos = await _gather((Symbol(c).info() for c in ins_codes), concurrency)
+    rows = []
+    for info in infos:
+        t = info.instrumentTransaction
+        common = {
+            'insCode': info.instrument.insCode,
+            'transactionDate': t.transactionDate,
+            'closingPrice': t.closingPrice,
+        }
+        rows += [common | vars(ct) for ct in info.instrumentClientTypes]
+    return _pl.LazyFrame(rows, infer_schema_length=None)
+
+
+def _ratio(numerator: str, denominator: str) -> _pl.Expr:
+    """Return numerator / denominator, or null where denominator is 0."""
+    return _pl.when(_col(denominator) > 0).then(
+        _col(numerator) / _col(denominator)
     )
-    return _pl.LazyFrame((vars(i) for i in res.root), infer_schema_length=None)
+
+
+def client_type_metrics(lf: _pl.LazyFrame, /) -> _pl.LazyFrame:
+    """Add derived client type columns to the result of client_types.
+
+    Added columns:
+        individualNetVolume: individual buy volume minus sell volume
+        individualNetValue: individualNetVolume * closingPrice
+        individualBuyPerCapita: average buy volume of an individual buyer
+        individualSellPerCapita: average sell volume of an individual seller
+        individualPowerRatio: individualBuyPerCapita / individualSellPerCapita
+    """
+    return lf.with_columns(
+        individualNetVolume=_col('sumIndividualBuyVolume')
+        - _col('sumIndividualSellVolume'),
+        individualBuyPerCapita=_ratio(
+            'sumIndividualBuyVolume', 'numberIndividualsBuyers'
+        ),
+        individualSellPerCapita=_ratio(
+            'sumIndividualSellVolume', 'numberIndividualsSellers'
+        ),
+    ).with_columns(
+        individualNetValue=_col('individualNetVolume') * _col('closingPrice'),
+        individualPowerRatio=_ratio(
+            'individualBuyPerCapita', 'individualSellPerCapita'
+        ),
+    )
+
+
+class SymbolSet(_CodeSet):
+    """A set of symbols stored as an Int64 insCode column.
+
+    Supports set operators (|, &, -, ^), membership tests of Symbol, str or
+    int, and filtering frames by their insCode column. Iterating yields
+    Symbol objects.
+    """
+
+    __slots__ = ()
+    _column = 'insCode'
+
+    def _item(self, code: int) -> Symbol:
+        return Symbol(str(code))
+
+    def _code(self, item) -> int:
+        return int(item.ins_code if isinstance(item, Symbol) else item)
+
+    async def histories(
+        self, *, limit: int = 99999, concurrency: int = 8
+    ) -> _pl.LazyFrame:
+        """Return Symbol.history of all the symbols as one LazyFrame."""
+        lfs = await self.gather(
+            'history', limit=limit, concurrency=concurrency
+        )
+        return _pl.concat(lfs, how='diagonal_relaxed')
+
+    async def client_types(self, *, concurrency: int = 8) -> _pl.LazyFrame:
+        return await client_types(
+            self.codes.cast(_pl.String), concurrency=concurrency
+        )
@@ -0,0 +1,47 @@
+"""Vectorized Persian text normalization.
+
+The API returns names as typed by the publishers, so the same name may use
+Arabic yeh and kaf, Arabic or Persian digits or stray zero-width
+characters, and joins between datasets (e.g. on smallSymbolName) silently
+miss. normalize is a Polars string expression, and normalize_strings
+applies it to every String column of a frame; symbols.search, funds.funds
+and funds.map_data accept ``normalize=True`` to do the same.
+"""
+
+from __future__ import annotations as _
+
+import polars as _pl
+
+_CHARS = {
+    '\u064a': 'ی',
+    '\u0649': 'ی',
+    '\u0643': 'ک',
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic digits
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian digits
+    # bidi marks, byte order mark and tatweel are removed
+    **dict.fromkeys(
+        '\u200e\u200f\u202a\u202b\u202c\u202d\u202e\ufeff\u0640', ''
+    ),
+}
+_ZWNJ = '\u200c'
+
+
+def normalize(expr: _pl.Expr, /) -> _pl.Expr:
+    """Return expr with Persian characters, digits and spaces normalized.
+
+    Arabic yeh and kaf are replaced by their Persian forms, Arabic and
+    Persian digits by ASCII digits, runs of whitespace by a single space,
+    and repeated ZWNJs by one; ZWNJs next to a space or at either end are
+    removed.
+    """
+    return (
+        expr.str.replace_many(list(_CHARS), list(_CHARS.values()))
+        .str.replace_all(rf'[\s{_ZWNJ}]*\s[\s{_ZWNJ}]*', ' ')
+        .str.replace_all(f'{_ZWNJ}+', _ZWNJ)
+        .str.strip_chars(f' {_ZWNJ}')
+    )
+
+
+def normalize_strings(lf: _pl.LazyFrame, /) -> _pl.LazyFrame:
+    """Apply normalize to all String columns of lf."""
+    return lf.with_columns(normalize(_pl.col(_pl.String)))
@@ -0,0 +1,84 @@
+from __future__ import annotations as _
+
+from pathlib import Path as _Path
+
+import polars as _pl
+from polars import col as _col
+
+from fipiran.symbols import index_compare
+
+
+def _normalize(dates: _pl.Series) -> _pl.Series:
+    return dates.cast(_pl.Date).unique().sort().alias('date')
+
+
+class TradingCalendar:
+    """The set of dates on which the market had a trading session.
+
+    The calendar is built from history frames (e.g. Symbol.history of
+    several symbols or an index) and the latest index_compare snapshot,
+    and can be cached locally using save and load.
+    """
+
+    __slots__ = ('dates',)
+
+    def __init__(self, dates: _pl.Series | None = None):
+        if dates is None:
+            dates = _pl.Series('date', dtype=_pl.Date)
+        self.dates = _normalize(dates)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} of {len(self.dates)} sessions>'
+
+    def __contains__(self, date) -> bool:
+        return date in self.dates
+
+    def update(
+        self, *lfs: _pl.LazyFrame, date: str = 'transactionDate'
+    ) -> None:
+        """Add the dates of lfs to the calendar."""
+        new = _pl.concat(
+            [lf.select(_col(date).dt.date().alias('date')) for lf in lfs]
+        ).collect()['date']
+        self.dates = _normalize(_pl.concat([self.dates, new]))
+
+    async def update_from_index_compare(self) -> None:
+        """Add the latest session date reported by symbols.index_compare."""
+        self.update(await index_compare(), date='date')
+
+    def save(self, path: _Path | str) -> None:
+        self.dates.to_frame().write_parquet(path)
+
+    @classmethod
+    def load(cls, path: _Path | str) -> TradingCalendar:
+        """Load a saved calendar, or return an empty one if path is missing."""
+        if not _Path(path).exists():
+            return cls()
+        return cls(_pl.read_parquet(path)['date'])
+
+    def gaps(
+        self,
+        lf: _pl.LazyFrame,
+        /,
+        *,
+        date: str = 'transactionDate',
+        by: str = 'insCode',
+    ) -> _pl.LazyFrame:
+        """Return the sessions missing from lf for each `by` group.
+
+        Only the sessions between the first and last date of each group are
+        considered. The result has `by` and `date` columns and can be used
+        to refetch only the missing data.
+        """
+        days = lf.select(by, _col(date).dt.date().alias('date'))
+        bounds = days.group_by(by).agg(
+            first=_col('date').min(), last=_col('date').max()
+        )
+        expected = bounds.join_where(
+            self.dates.to_frame().lazy(),
+            _col('date') >= _col('first'),
+            _col('date') <= _col('last'),
+        ).select(by, 'date')
+        return expected.join(days, on=[by, 'date'], how='anti').sort(
+            by, 'date'
+        )
@@ -0,0 +1,109 @@
+import polars as pl
+import pytest
+from pytest_aiohutils import file
+
+from fipiran.analytics import (
+    correlations,
+    drawdown,
+    ema,
+    log_returns,
+    moving_average,
+    nav_matrix,
+    peer_ranks,
+    resample,
+    rolling_alpha_beta,
+    rolling_volatility,
+    rsi,
+)
+from fipiran.funds import Fund, funds, navps_histories
+from fipiran.symbols import Symbol, adjust_history
+
+
+async def two_symbols() -> pl.LazyFrame:
+    lf = await Symbol('35425587644337450').history()
+    return adjust_history(
+        pl.concat([lf, lf.with_columns(insCode=pl.lit('1'))])
+    )
+
+
+@file('symbol_history.json')
+async def test_indicators():
+    df = (
+        (await two_symbols())
+        .with_columns(
+            log_returns(),
+            moving_average(20),
+            rolling_volatility(20),
+            ema(12),
+            rsi(),
+            drawdown(),
+        )
+        .collect()
+    )
+    # both symbols have the same data, so should have the same indicators
+    a, b = df.partition_by('insCode')
+    columns = ['logReturn', 'ma20', 'volatility20', 'ema12', 'rsi14']
+    assert a.select(columns).equals(b.select(columns))
+    assert df['rsi14'].drop_nans().is_between(0, 100).all()
+    assert df.select(pl.col('drawdown').max()).item() <= 0
+    # first return of each symbol should not be computed from the other one
+    assert (
+        df.group_by('insCode')
+        .agg(pl.col('logReturn').first())['logReturn']
+        .is_null()
+        .all()
+    )
+
+
+@file('symbol_history.json')
+async def test_resample():
+    df = resample(await two_symbols(), '1mo').collect()
+    assert df['insCode'].n_unique() == 2
+    assert (df['priceMin'] <= df['priceMax']).all()
+    assert (
+        df.filter(pl.col('insCode') == '1')['transactionDate']
+        .is_unique()
+        .all()
+    )
+
+
+@file('getfundchart_atlas.json')
+async def test_resample_navps():
+    lf = await Fund(11215).navps_history(all_=False)
+    df = (
+        resample(lf, '1w', date='date', by=None, aggs=[pl.all().last()])
+        .with_columns(log_returns('cancelNav', by=None))
+        .collect()
+    )
+    assert df['date'].is_sorted()
+    assert df['logReturn'][1:].is_not_null().all()
+
+
+@file('getfundchart_atlas.json')
+async def test_fund_panel():
+    # both funds get the same recorded data
+    lf = await navps_histories([Fund(11215), Fund(11216)], all_=False)
+    matrix = nav_matrix(lf)
+    assert matrix.columns == ['date', '11215', '11216']
+    assert matrix['date'].is_sorted()
+
+    corr = correlations(matrix)
+    assert corr['regNo'].to_list() == ['11215', '11216']
+    assert corr.drop('regNo').to_numpy() == pytest.approx(1.0)
+
+    ab = (
+        rolling_alpha_beta(lf, await Fund(11215).navps_history(all_=False), 20)
+        .drop_nulls()
+        .collect()
+    )
+    assert ab.height > 0
+    assert ab['beta'].to_numpy() == pytest.approx(1.0)
+    assert ab['alpha'].to_numpy() == pytest.approx(0.0, abs=1e-12)
+
+
+@file('fundcompare.json')
+async def test_peer_ranks():
+    df = peer_ranks(await funds(), ['annualEfficiency', 'netAsset']).collect()
+    best = df.filter(pl.col('netAssetRank') == 1)
+    assert best['fundType'].is_unique().all()
+    assert (df['netAssetRank'] <= df['peerCount']).all()
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import polars as pl
+from pytest import raises
+from pytest_aiohutils import file, files
+
+import fipiran
+from fipiran import set_cache
+from fipiran.__main__ import parse_args
+from fipiran.export import PER_ITEM, export_items, export_snapshot
+from fipiran.funds import fund_types
+
+FMELLI = '35425587644337450'
+
+
+@file('fundcompare.json')
+async def test_export_snapshot(tmp_path):
+    await export_snapshot('funds', tmp_path, format='csv')
+    df = pl.read_csv(tmp_path / 'funds.csv')
+    assert df.height > 0
+
+    await export_snapshot('funds', tmp_path, partition_by=['fundType'])
+    parts = [*(tmp_path / 'funds').glob('fundType=*/data.parquet')]
+    assert len(parts) > 1
+    assert pl.read_parquet(parts).height == df.height
+
+
+@file('symbol_history.json')
+async def test_export_items(tmp_path):
+    n = await export_items('history', tmp_path, [FMELLI], format='ndjson')
+    assert n == 1
+    path = tmp_path / 'history' / f'{FMELLI}.ndjson'
+    full = pl.read_ndjson(path, infer_schema_length=None)
+    # old rows are kept and refetched rows are not duplicated
+    await export_items(
+        'history', tmp_path, [FMELLI], format='ndjson', incremental=True
+    )
+    assert pl.read_ndjson(path, infer_schema_length=None).height == full.height
+
+
+@file('symbol_history.json')
+async def test_export_items_failure(tmp_path, monkeypatch):
+    fetch, date, kind = PER_ITEM['history']
+
+    async def failing(ins_code, last):
+        if ins_code == 'bad':
+            raise ConnectionError
+        return await fetch(ins_code, last)
+
+    monkeypatch.setitem(PER_ITEM, 'history', (failing, date, kind))
+    with raises(ExceptionGroup) as info:
+        await export_items('history', tmp_path, ['bad', FMELLI])
+    # the other items are still written
+    assert (tmp_path / 'history' / f'{FMELLI}.parquet').exists()
+    (error,) = info.value.exceptions
+    assert isinstance(error, ConnectionError)
+    assert error.__notes__ == ['insCode bad']
+
+
+@files('getfundchart_atlas.json', 'getfundchart_atlas.json')
+async def test_export_items_fund_chart_gap(tmp_path, monkeypatch):
+    read = fipiran._read
+    show_all = []
+
+    async def spy(url, *args, **kwargs):
+        show_all.append(kwargs['params']['showAll'])
+        return await read(url, *args, **kwargs)
+
+    monkeypatch.setattr(fipiran, '_read', spy)
+    path = tmp_path / 'navps' / '11215.parquet'
+    path.parent.mkdir()
+    old = pl.DataFrame(
+        {'date': [datetime(2020, 1, 1)], 'statisticalNav': [1.0]}
+    )
+    old.write_parquet(path)
+    await export_items('navps', tmp_path, ['11215'], incremental=True)
+    # the recent chart starts after the export, so all of it is fetched
+    assert show_all == ['false', 'true']
+    df = pl.read_parquet(path)
+    assert df['date'].min() == datetime(2020, 1, 1)
+    assert df.height > 300
+
+
+@files('fund_types.json')
+async def test_cache(tmp_path):
+    set_cache(tmp_path)
+    try:
+        # the second call would fail if it was not served from the cache
+        a = (await fund_types()).collect()
+        b = (await fund_types()).collect()
+    finally:
+        set_cache(None)
+    assert a.equals(b)
+    assert len([*tmp_path.iterdir()]) == 1
+
+
+def test_parse_args():
+    ns = parse_args(['history', 'funds', '-f', 'csv', '--items', '1', '2'])
+    assert ns.datasets == ['history', 'funds']
+    assert ns.items == ['1', '2']
+    assert ns.format == 'csv'
@@ -1,28 +1,44 @@
+from datetime import timedelta
+
 from polars import (
     Boolean,
+    Categorical,
+    DataFrame,
     Datetime,
     Float64,
     Int64,
     LazyFrame,
     Null,
     String,
+    UInt32,
     col,
     len as pl_len,
 )
-from pytest_aiohutils import file, files
+from pydantic import BaseModel
+from pytest import raises
+from pytest_aiohutils import file, file_map, files
 
+import fipiran.funds
 from fipiran.funds import (
+    DependencyGraph,
     DepItem,
     Fund,
     FundInfo,
+    FundSet,
+    FundStore,
+    NavIndex,
     SpecificFundInfo,
     TreeMapItem,
+    _api,
     _CommonFundInfo,
+    _DepData,
     average_returns,
+    dependency_graph,
     dependency_graph_data,
     fund_types,
     funds,
     map_data,
+    navps_histories,
 )
 
 _KNOWN_DTYPES = {
@@ -259,6 +275,49 @@ async def test_dependency_graph_data():
     assert not unexpected_keys
 
 
+@file('dependencygraph.json')
+async def test_dependency_graph():
+    graph = await dependency_graph()
+    assert graph.funds.height == 568
+    assert graph.managers['managerId'].is_unique().all()
+    assert graph.guarantors['guarantorId'].is_unique().all()
+    assert 'manager' not in graph.funds.columns
+
+    manager = graph.managers.row(0, named=True)
+    funds_ = graph.funds_of_manager(manager['managerId'])
+    assert funds_.height > 0
+    assert (funds_['tempManagerName'] == manager['name']).all()
+    assert graph.funds_of_manager(-1).height == 0
+
+    exposure = graph.guarantor_exposure()
+    assert exposure['fundCount'].sum() == graph.funds['guarantorIndex'].count()
+    top = exposure.row(0, named=True)
+    assert (
+        graph.funds_of_guarantor(top['guarantorId'])['netAsset'].sum()
+        == top['netAsset']
+    )
+    assert graph.manager_exposure()['fundCount'].sum() == 568
+
+
+@file('dependencygraph.json')
+async def test_dependency_graph_without_nodes():
+    graph = DependencyGraph([])
+    assert graph.funds.schema == {
+        'managerIndex': UInt32,
+        'guarantorIndex': UInt32,
+    }
+    assert graph.funds_of_manager(1).height == 0
+
+    items = (await _api('fund/dependencygraph', model=_DepData)).items
+    graph = DependencyGraph(
+        [i.model_copy(update={'guarantor': None}) for i in items]
+    )
+    assert graph.funds['guarantorIndex'].dtype == UInt32
+    assert graph.funds['guarantorIndex'].null_count() == len(items)
+    assert graph.guarantor_exposure().height == 0
+    assert graph.manager_exposure()['fundCount'].sum() == len(items)
+
+
 @file('alpha_beta.json')
 async def test_alpha_beta():
     lf = await fund.alpha_beta(all_=False)
@@ -277,6 +336,87 @@ async def test_alpha_beta():
     assert is_sorted
 
 
+@file_map(
+    ('fund/fundcompare/', 'fundcompare.json'), ('fund/treemap', 'treemap.json')
+)
+async def test_fund_store():
+    store = FundStore()
+    await store.refresh()
+    lf = await store.funds()
+    assert lf.collect_schema()['manager'] == Categorical
+    assert (await store.map_data()).collect_schema()['auditor'] == Categorical
+    row = await store.info(11215)
+    assert row['regNo'] == '11215'
+    with raises(KeyError):
+        await store.info(-1)
+
+
+@files('fundcompare.json', 'fundcompare_watchlist.json')
+async def test_fund_store_refresh_funds():
+    store = FundStore()
+    before = (await store.funds()).collect()
+    new = (await store.refresh_funds([11215, '11726'])).collect()
+    assert set(new['regNo']) == {'11215', '11726'}
+    after = (await store.funds()).collect()
+    assert after.height == before.height
+    assert (await store.info('11726'))['name'] == new.filter(regNo='11726')[
+        'name'
+    ].item()
+
+
+@file('fundcompare.json')
+async def test_fund_store_refresh_no_funds(monkeypatch):
+    requested = []
+
+    async def spy(reg_nos=()):
+        requested.append([*reg_nos])
+        return await funds(reg_nos)
+
+    monkeypatch.setattr(fipiran.funds, 'funds', spy)
+    store = FundStore()
+    # an empty regNos would download all the funds
+    assert (await store.refresh_funds([])).collect().is_empty()
+    assert requested == []
+    before = (await store.funds()).collect()
+    new = (await store.refresh_funds([])).collect()
+    assert new.is_empty()
+    assert new.columns == before.columns
+    assert (await store.funds()).collect().equals(before)
+    assert requested == [[]]  # only the initial download
+
+
+@file('getfundchart_atlas.json')
+async def test_nav_index(tmp_path):
+    lf = await navps_histories([fund], all_=False)
+    index = NavIndex(lf)
+    path = tmp_path / 'nav.parquet'
+    index.save(path)
+    index = NavIndex.load(path)
+    assert len(index.df) == lf.select(pl_len()).collect().item()
+
+    history = lf.collect()
+    first, last = history['date'][0], history['date'][-1]
+    queries = DataFrame(
+        {
+            'regNo': ['11215', '11215', '11215', '1'],
+            'date': [
+                last + timedelta(days=3),
+                first,
+                first - timedelta(1),
+                last,
+            ],
+        }
+    )
+    result = index.lookup(queries.lazy()).collect()
+    assert result['date'].to_list() == queries['date'].to_list()
+    assert result['cancelNav'].to_list() == [
+        history['cancelNav'][-1],
+        history['cancelNav'][0],
+        None,
+        None,
+    ]
+
+
 @file('fund_types.json')
 async def test_fund_types():
     lf = await fund_types()
@@ -340,3 +480,38 @@ async def test_group_id():
     chatr_info = await chatr.info()
     assert resana_info.regNo == chatr_info.regNo
     assert resana_info.issueNav != chatr_info.issueNav
+
+
+@file('fundcompare.json')
+async def test_fund_set():
+    lf = await funds()
+    all_ = FundSet.from_frame(lf)
+    some = FundSet([11215, '11216', 11215])
+    assert len(some) == 2
+    assert Fund(11215) in some and '11216' in some and 1 not in some
+    assert Fund(11215) == Fund('11215', 0)
+    # only the default group_id is represented
+    assert Fund(11215, 1) not in some
+    assert [*FundSet([Fund(11215)])] == [Fund(11215)]
+    with raises(ValueError):
+        FundSet([Fund(11215, 1)])
+    assert hash(FundSet(['11216', 11215])) == hash(some)
+    assert len(all_ | some) == len(all_ | some | some)
+    assert (all_ & some) | (some - all_) == some
+    assert not (some ^ some)
+    n = len(all_ & some)
+    assert all_.filter(lf).collect().height == lf.collect().height
+    assert some.filter(lf).select('regNo').collect()['regNo'].n_unique() == n
+
+
+@file('getfund_atlas.json')
+async def test_info_struct():
+    info = await fund.info()
+    struct = await fund.info(struct=True)
+    assert not hasattr(struct, '__dict__')
+    for name in SpecificFundInfo.model_fields:
+        value = getattr(info, name)
+        if isinstance(value, BaseModel):
+            assert type(getattr(struct, name)).__name__ == type(value).__name__
+        elif not isinstance(value, list):
+            assert getattr(struct, name) == value
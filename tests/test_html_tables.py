@@ -0,0 +1,28 @@
+import polars as pl
+from pytest_aiohutils import file
+
+from fipiran._html import fipiran_tables
+
+
+@file('profit_growth.html')
+async def test_typed_tables():
+    (df,) = await fipiran_tables('profit_growth')
+    assert df.schema['سود واقعی دوره قبل'] == pl.Int64
+    assert df.schema['تاریخ انتشار'] == pl.String
+    # accounting negatives, e.g. (186)
+    assert df.select(pl.col('سود واقعی دوره قبل').min()).item() < 0
+
+
+@file('financial_ratios.html')
+async def test_financial_ratios():
+    (df,) = await fipiran_tables('financial_ratios')
+    assert df.height == 1342
+    assert df.schema['ROA'] == pl.Float64
+    assert not df['نماد'].str.contains('[يك]').any()
+
+
+@file('priceDataFMelli.html')
+async def test_ragged_rows():
+    (df,) = await fipiran_tables('priceDataFMelli')
+    assert df.shape == (7, 4)
+    assert df.columns[1:] == ['column_1', 'column_2', 'column_3']
@@ -0,0 +1,115 @@
+from datetime import date
+
+import polars as pl
+from pytest_aiohutils import file_map
+
+from fipiran import indices
+from fipiran.indices import IndexStore
+
+
+@file_map(
+    ('index/indexcompare', 'index_compare.json'),
+    ('instrument/instrumentcompare', 'shcarbon_search.json'),
+)
+async def test_update(tmp_path):
+    store = IndexStore()
+    await store.update(['10523825119011581', '1123534346391630'])
+    day = date(2025, 10, 1)
+
+    matrix = store.matrix()
+    assert matrix.height == 1
+    assert matrix['date'][0] == day
+    assert matrix['10523825119011581'][0] == 175755.2
+
+    constituents = store.constituents()
+    assert set(constituents['indexCode']) == {
+        '10523825119011581',
+        '1123534346391630',
+    }
+    assert store.constituents(day).equals(constituents)
+    assert store.constituents(date(2025, 9, 30)).is_empty()
+
+    store.save(tmp_path)
+    loaded = IndexStore.load(tmp_path)
+    assert loaded.values.equals(store.values)
+    assert loaded.members.equals(store.members)
+
+
+@file_map(
+    ('index/indexcompare', 'index_compare.json'),
+    ('instrument/instrumentcompare', 'shcarbon_search.json'),
+)
+async def test_update_without_members(monkeypatch):
+    search_ = indices._search
+
+    async def search(idx_code):
+        if idx_code == '1123534346391630':
+            # what search returns when no instrument matches
+            return pl.LazyFrame(), pl.LazyFrame()
+        return await search_(idx_code=idx_code)
+
+    store = IndexStore()
+    await store.update([])
+    assert store.values.height > 0
+    assert store.members.is_empty()
+
+    codes = ['10523825119011581', '1123534346391630']
+    monkeypatch.setattr(indices, '_search', search)
+    await store.update(codes)
+    assert set(store.constituents()['indexCode']) == {'10523825119011581'}
+
+    # the members of an index are kept if search returns no instruments
+    monkeypatch.setattr(indices, '_search', search_)
+    await store.update(codes)
+    members = store.members
+    monkeypatch.setattr(indices, '_search', search)
+    await store.update(codes)
+    assert store.members.equals(members)
+
+
+def test_update_members():
+    store = IndexStore()
+    d1, d2, d3 = date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)
+    snapshot = pl.DataFrame({'indexCode': ['i', 'i'], 'insCode': ['a', 'b']})
+    store._update_members(snapshot, d1)
+    # a same-day correction replaces the interval of b
+    store._update_members(snapshot.with_columns(insCode=pl.lit('a')), d1)
+    assert store.members.height == 1
+    store._update_members(
+        pl.DataFrame({'indexCode': ['i'], 'insCode': ['c']}), d2
+    )
+    # indices missing from a snapshot are not changed
+    store._update_members(
+        pl.DataFrame({'indexCode': ['j'], 'insCode': ['a']}), d3
+    )
+    assert store.members.sort('indexCode', 'insCode').to_dicts() == [
+        {'indexCode': 'i', 'insCode': 'a', 'validFrom': d1, 'validTo': d2},
+        {'indexCode': 'i', 'insCode': 'c', 'validFrom': d2, 'validTo': None},
+        {'indexCode': 'j', 'insCode': 'a', 'validFrom': d3, 'validTo': None},
+    ]
+    assert store.constituents(d1)['insCode'].to_list() == ['a']
+
+    history = pl.LazyFrame(
+        {
+            'insCode': ['a', 'a', 'a', 'b'],
+            'transactionDate': [d1, d2, d3, d1],
+        }
+    ).with_columns(pl.col('transactionDate').cast(pl.Datetime))
+    joined = store.membership(history).sort('transactionDate').collect()
+    assert joined.select(
+        'indexCode', pl.col('transactionDate').dt.date()
+    ).rows() == [('i', d1), ('j', d3)]
+
+
+def test_add_values():
+    store = IndexStore()
+    lf = pl.LazyFrame(
+        {
+            'transactionDate': [date(2025, 1, 1), date(2025, 1, 2)],
+            'closingPrice': [1, 2],
+        }
+    ).with_columns(pl.col('transactionDate').cast(pl.Datetime))
+    store.add_values(lf, index_code='i')
+    store.add_values(lf.with_columns(closingPrice=3), index_code='i')
+    assert store.values['value'].to_list() == [3.0, 3.0]
+    assert store.matrix().columns == ['date', 'i']
@@ -0,0 +1,35 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import polars as pl
+from pytest_aiohutils import file
+
+from fipiran.ipc import FrameHandle, share, share_histories, share_partitions
+
+FMELLI = '35425587644337450'
+
+
+def test_share(tmp_path):
+    df = pl.DataFrame({'insCode': ['1', '1', '2'], 'x': [1, 2, 3]})
+    with share(df, tmp_path) as handle:
+        assert pickle.loads(pickle.dumps(handle)) == handle
+        with ProcessPoolExecutor(
+            1, mp_context=get_context('spawn')
+        ) as executor:
+            df2 = executor.submit(FrameHandle.read, handle).result()
+        assert df2.equals(df)
+    assert not Path(handle.path).exists()
+
+    handles = share_partitions(df, directory=tmp_path)
+    assert handles.keys() == {'1', '2'}
+    assert handles['1'].scan().collect()['x'].to_list() == [1, 2]
+
+
+@file('symbol_history.json')
+async def test_share_histories(tmp_path):
+    handles = await share_histories([FMELLI], tmp_path)
+    df = handles[FMELLI].read()
+    assert df.height > 0
+    assert (df['insCode'] == FMELLI).all()
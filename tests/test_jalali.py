@@ -0,0 +1,36 @@
+from datetime import date, datetime
+
+import polars as pl
+from jdatetime import date as jdate
+
+from fipiran.jalali import date_parts, month_start, to_str, weekday
+
+
+def test_matches_jdatetime():
+    dates = pl.date_range(
+        date(1990, 1, 1), date(2040, 12, 31), eager=True
+    ).alias('d')
+    df = pl.DataFrame(dates).select(
+        'd',
+        parts=date_parts(pl.col('d')),
+        weekday=weekday(pl.col('d')),
+        text=to_str(pl.col('d')),
+    )
+    for d, parts, wd, text in df.iter_rows():
+        j = jdate.fromgregorian(date=d)
+        assert (parts['year'], parts['month'], parts['day']) == (
+            j.year,
+            j.month,
+            j.day,
+        )
+        assert wd == j.weekday()
+        assert text == j.strftime('%Y/%m/%d')
+
+
+def test_month_start():
+    df = pl.DataFrame(
+        {'transactionDate': [datetime(2025, 3, 20), datetime(2025, 3, 21)]}
+    ).select(month_start(pl.col('transactionDate')))
+    assert df.columns == ['transactionDateMonthStart']
+    # 1403/12/30 (a leap day) and 1404/01/01
+    assert df.to_series().to_list() == [date(2025, 2, 19), date(2025, 3, 21)]
@@ -0,0 +1,23 @@
+from pydantic import ValidationError
+from pytest import raises
+
+from fipiran.conftest import LooseModel
+
+
+class Item(LooseModel):
+    required: int
+    optional: int | None
+
+
+def test_loose_model_defaults():
+    assert Item.model_validate({'required': 1}).optional is None
+    assert Item.model_validate_json('{"required": 1}').optional is None
+    item = Item.model_validate({'required': 1, 'extra': 'x'})
+    assert item.model_extra == {'extra': 'x'}
+
+
+def test_loose_model_missing_required():
+    with raises(ValidationError):
+        Item.model_validate({'optional': 1})
+    with raises(ValidationError):
+        Item.model_validate_json('{"optional": 1}')
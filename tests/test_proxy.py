@@ -0,0 +1,39 @@
+from asyncio import gather
+
+import polars as pl
+from aiohttp.test_utils import TestClient, TestServer
+from pytest_aiohutils import files
+
+import fipiran
+from fipiran.proxy import app
+
+
+@files('fund_types.json')
+async def test_services():
+    async with TestClient(TestServer(app())) as client:
+        # only one upstream response is available, the rest must be shared
+        responses = await gather(
+            *[client.get('/services/fund/fundtype') for _ in range(3)]
+        )
+        bodies = {await r.read() for r in responses}
+        assert [r.status for r in responses] == [200] * 3
+        assert len(bodies) == 1
+        r = await client.get('/services/fund/fundtype')
+        assert await r.read() in bodies
+
+
+@files('fundcompare.json')
+async def test_arrow():
+    async with TestClient(TestServer(app())) as client:
+        r = await client.get('/arrow/funds')
+        assert r.content_type == 'application/vnd.apache.arrow.stream'
+        df = pl.read_ipc_stream(await r.read())
+        assert df.height > 0
+        assert (await client.get('/arrow/unknown')).status == 404
+
+
+def test_use_proxy():
+    fipiran.use_proxy('http://127.0.0.1:8080/')
+    assert fipiran._api_base == 'http://127.0.0.1:8080/services/'
+    fipiran.use_proxy(None)
+    assert fipiran._api_base == fipiran._API
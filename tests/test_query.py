@@ -0,0 +1,113 @@
+from polars import col
+from pytest import MonkeyPatch
+from pytest_aiohutils import file
+
+from fipiran import query
+from fipiran.query import SearchQuery
+from fipiran.symbols import MarketType, SymbolStatus, SymbolType, search
+
+
+def test_params():
+    q = SearchQuery(idx_code='1').filter(
+        col('marketCode') == 1,
+        col('type').is_in([300, 400]) & (col('symbolStatus') == 'A'),
+        col('industryGroupCode') == '44 ',
+    )
+    assert q.params() == {
+        'idx_code': '1',
+        'markettype': MarketType.TEHRAN_STOCK_EXCHANGE,
+        'symboltype': SymbolType.ORDINARY_SHARES_TSE | SymbolType.RIGHTS_TSE,
+        'symbolstatus': SymbolStatus.ALLOWED,
+        'industry': '44 ',
+    }
+    assert str(q.params()['symboltype']) == '300,400'
+
+    top = q.sort('transactionValue', descending=True).head(3)
+    assert top.params()['limit'] == 3
+    assert top.params()['column'] == 'transactionValue'
+    assert top.params()['sort'] == 'desc'
+    # the unchanged query is not affected
+    assert 'limit' not in q.params()
+
+
+def test_params_local():
+    # not expressible as search parameters
+    q = SearchQuery().filter(col('marketCode') > 1).head(3)
+    assert q.params() == {}
+    q = SearchQuery().filter(col('marketCode') == 99).head(3)
+    assert q.params() == {}
+    q = SearchQuery().sort('insCode').head(3)
+    assert q.params() == {}
+    # the order of strings and of nulls in ascending sorts may differ
+    q = SearchQuery().sort('smallSymbolName').head(3)
+    assert q.params() == {'column': 'smallSymbolName', 'sort': 'asc'}
+    q = SearchQuery().sort('transactionValue').head(3)
+    assert 'limit' not in q.params()
+    # filters after head must not be pushed down
+    q = SearchQuery().head(3).filter(col('marketCode') == 1)
+    assert q.params() == {'limit': 3}
+    # the second filter of the same parameter stays local
+    q = SearchQuery().filter(col('marketCode') == 1, col('marketCode') == 2)
+    assert q.params() == {'markettype': MarketType.TEHRAN_STOCK_EXCHANGE}
+    assert 'limit' not in q.head(1).params()
+
+
+@file('shcarbon_search.json')
+async def test_fetch():
+    q = (
+        SearchQuery()
+        .filter(col('marketCode') == 2, col('transactionValue') > 0)
+        .sort('transactionValue', descending=True)
+        .head(1)
+    )
+    # the filter on transactionValue prevents pushing head down
+    assert 'limit' not in q.params()
+    df = (await q.fetch()).collect()
+    assert df['insCode'].to_list() == ['26920184079396692']
+
+
+@file('shcarbon_search.json')
+async def test_fetch_equals_local():
+    instruments, transactions = await search()
+    expected = (
+        instruments.join(transactions, on='insCode', how='left')
+        .filter(col('type').is_in([300, 303]))
+        .sort('smallSymbolName')
+    ).collect()
+    assert expected.height == 2
+    got = (
+        await SearchQuery()
+        .filter(col('type').is_in([300, 303]))
+        .sort('smallSymbolName')
+        .fetch()
+    ).collect()
+    assert got.equals(expected)
+
+
+@file('shcarbon_search.json')
+async def test_fetch_pushed_equals_local(monkeypatch: MonkeyPatch):
+    instruments, transactions = await search()
+    joined = instruments.join(transactions, on='insCode', how='left')
+    # one instrument has no transaction row
+    assert joined.filter(col('transactionValue').is_null()).collect().height
+
+    async def server(*, limit: int, column: str, sort: str):
+        # the rows a server sorting nulls last would return
+        top = joined.sort(
+            column, descending=sort == 'desc', nulls_last=True
+        ).head(limit)
+        return (
+            instruments.join(top, on='insCode', how='semi'),
+            transactions.join(top, on='insCode', how='semi'),
+        )
+
+    q = SearchQuery().sort('transactionValue', descending=True).head(2)
+    assert q.params()['limit'] == 2
+    local = (await q.fetch()).collect()  # the fixture ignores limit
+    monkeypatch.setattr(query, '_search', server)
+    pushed = (await q.fetch()).collect()
+    assert pushed.equals(local)
+    assert pushed['insCode'].to_list() == [
+        '26920184079396692',
+        '11326461864120062',
+    ]
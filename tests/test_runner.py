@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import polars as pl
+from pytest import raises
+from pytest_aiohutils import file
+
+from fipiran import runner
+from fipiran.runner import map_frames, map_histories
+from fipiran.symbols import Symbol, adjust_history
+
+FMELLI = '35425587644337450'
+
+
+@file('symbol_history.json')
+async def test_map_histories():
+    df = (
+        await map_histories(adjust_history, [FMELLI, FMELLI], processes=2)
+    ).collect()
+    expected = adjust_history(await Symbol(FMELLI).history()).collect()
+    assert df.equals(pl.concat([expected, expected]))
+
+
+@file('symbol_history.json')
+async def test_map_frames_failure(tmp_path):
+    async def fail():
+        raise LookupError
+
+    aws = [Symbol(FMELLI).history(), fail(), Symbol(FMELLI).history()]
+    with raises(LookupError):
+        await map_frames(adjust_history, aws, processes=2, directory=tmp_path)
+    # no shared inputs or results are left behind
+    assert [*tmp_path.iterdir()] == []
+
+
+@file('symbol_history.json')
+async def test_map_frames_shared_bound(tmp_path, monkeypatch):
+    share = runner._share
+    handles = []
+    live = []
+
+    def spy(df, directory):
+        handles.append(share(df, directory))
+        live.append(sum(Path(h.path).exists() for h in handles))
+        return handles[-1]
+
+    monkeypatch.setattr(runner, '_share', spy)
+    aws = [Symbol(FMELLI).history() for _ in range(12)]
+    await map_frames(adjust_history, aws, processes=1, directory=tmp_path)
+    assert len(live) == 12
+    # one frame being processed and 2 * processes waiting
+    assert max(live) <= 3
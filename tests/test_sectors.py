@@ -0,0 +1,68 @@
+import polars as pl
+from pytest_aiohutils import file, file_map
+
+from fipiran.sectors import IndustryTree, SectorAggregates
+from fipiran.symbols import search
+
+
+@file_map(
+    ('instrument/getindustry', 'industries.json'),
+    ('instrument/getindustrysub', 'sub_industries.json'),
+)
+async def test_industry_tree():
+    tree = await IndustryTree.fetch()
+    assert '44' in tree
+    assert tree.group('4429') == tree.group('44 ') == '44'
+    assert '4429' in tree.children['44']
+    assert all(tree.group(s) == g for s, g in tree.parent.items())
+    df = tree.frame().collect()
+    assert df.height == len(tree.parent)
+
+
+@file('shcarbon_search.json')
+async def test_sector_aggregates():
+    instruments, transactions = await search()
+    aggregates = SectorAggregates()
+    assert aggregates.update(instruments, transactions) == 4
+    assert aggregates.update(instruments, transactions) == 0
+    before = aggregates.industries().collect()
+    assert before['symbols'].sum() == 4
+
+    # only the changed symbol is applied
+    ins_code = '27308217070238237'
+    changed = transactions.filter(pl.col('insCode') == ins_code).with_columns(
+        transactionValue=pl.col('transactionValue') + 1000,
+        closingPrice=pl.col('priceYesterday'),
+    )
+    assert aggregates.update(instruments, changed) == 1
+
+    expected = SectorAggregates()
+    expected.update(
+        instruments,
+        pl.concat(
+            [transactions.filter(pl.col('insCode') != ins_code), changed]
+        ),
+    )
+    for got, want in (
+        (aggregates.industries(), expected.industries()),
+        (aggregates.sub_industries(), expected.sub_industries()),
+    ):
+        got, want = got.collect(), want.collect()
+        assert got.drop('changeSum', 'averageChange').equals(
+            want.drop('changeSum', 'averageChange')
+        )
+        diff = (got['changeSum'] - want['changeSum']).abs()
+        assert (diff < 1e-9).all()
+    row = (
+        aggregates.industries()
+        .filter(pl.col('industryGroupCode') == '44')
+        .collect()
+    )
+    assert row['unchanged'].item() == 1
+    assert (
+        row['transactionValue'].item()
+        == before.filter(pl.col('industryGroupCode') == '44')[
+            'transactionValue'
+        ].item()
+        + 1000
+    )
@@ -0,0 +1,200 @@
+from hashlib import sha1, sha256
+from pathlib import Path
+
+import polars as pl
+from aiohutils.session import SessionManager
+from pytest import raises
+from pytest_aiohutils import file
+
+from fipiran.statements import (
+    StatementsWatcher,
+    download_statements,
+    parse_statement_file,
+    parse_statement_files,
+)
+from fipiran.symbols import Symbol
+
+TESTDATA = Path(__file__).parent / 'testdata'
+CONTENT = b'%PDF-1.4 fake statement'
+
+
+class FakeStream:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def iter_chunked(self, n: int):
+        for i in range(0, len(self.data), n):
+            yield self.data[i : i + n]
+
+
+class FakeFileResponse:
+    content_disposition = None
+
+    def __init__(self, headers: dict):
+        start = int(headers.get('Range', 'bytes=0-')[6:-1])
+        self.status = 206 if start else 200
+        self.content = FakeStream(CONTENT[start:])
+
+    def release(self):
+        pass
+
+
+@file('symbol_statements.json')
+async def test_download_statements(tmp_path, monkeypatch):
+    statements = await Symbol('35425587644337450').statements()
+    pairs = [('35425587644337450', s) for s in statements[:3]]
+
+    requested = []
+
+    async def request(self, method, url, headers):
+        requested.append(url)
+        return FakeFileResponse(headers)
+
+    monkeypatch.setattr(SessionManager, 'request', request)
+    # a partial download of the first pdf to be resumed
+    url = pairs[0][1].pdfUrl
+    (tmp_path / f'{sha1(url.encode()).hexdigest()}.part').write_bytes(
+        CONTENT[:5]
+    )
+
+    manifest = (
+        await download_statements(pairs, tmp_path, chunk_size=4)
+    ).collect()
+    assert manifest['url'].is_unique().all()
+    assert len(requested) == manifest.height
+    # all fake files have the same content and are stored once
+    digest = sha256(CONTENT).hexdigest()
+    assert set(manifest['sha256']) == {digest}
+    stored = [p for p in tmp_path.iterdir() if p.name != 'manifest.parquet']
+    assert {p.stem for p in stored} == {digest}
+    assert all(p.read_bytes() == CONTENT for p in stored)
+
+    # urls already in the manifest are skipped
+    requested.clear()
+    again = (await download_statements(pairs, tmp_path)).collect()
+    assert not requested
+    assert again.height == manifest.height
+
+
+@file('symbol_statements.json')
+async def test_download_statements_failure(tmp_path, monkeypatch):
+    statements = await Symbol('35425587644337450').statements()
+    pairs = [('35425587644337450', s) for s in statements[:3]]
+    failing = pairs[1][1].pdfUrl
+    requested = []
+    failed = []
+
+    async def request(self, method, url, headers):
+        requested.append(url)
+        if url == failing and not failed:
+            failed.append(url)
+            raise ConnectionError
+        return FakeFileResponse(headers)
+
+    monkeypatch.setattr(SessionManager, 'request', request)
+    with raises(ConnectionError):
+        await download_statements(pairs, tmp_path)
+    # the completed downloads are kept in the manifest
+    manifest = pl.read_parquet(tmp_path / 'manifest.parquet')
+    assert manifest.height == len(requested) - 1
+    assert failing not in manifest['url']
+
+    requested.clear()
+    await download_statements(pairs, tmp_path)
+    assert requested == [failing]
+
+
+@file('symbol_statements.json')
+async def test_statements_watcher():
+    ins_code = '35425587644337450'
+    statements = await Symbol(ins_code).statements()
+
+    watcher = StatementsWatcher([ins_code], min_interval=0)
+    assert await watcher.poll() == []  # the first poll sets the baseline
+    latest = max(s.publishDateTime for s in statements)
+    assert watcher.last_seen == {ins_code: latest}
+
+    watcher = StatementsWatcher(
+        [ins_code],
+        last_seen={ins_code: statements[2].publishDateTime},
+        min_interval=0,
+        page_size=100,
+    )
+    new = await watcher.poll()
+    assert new == [(ins_code, statements[1]), (ins_code, statements[0])]
+    assert watcher.last_seen[ins_code] == latest
+    assert await watcher.poll() == []
+    assert watcher.intervals[ins_code] == 0
+
+
+@file('symbol_statements.json')
+async def test_statements_watcher_failure(monkeypatch):
+    ins_code = '35425587644337450'
+    statements = await Symbol(ins_code).statements()
+    last_seen = statements[1].publishDateTime
+    watcher = StatementsWatcher(
+        ['a', ins_code],
+        last_seen={'a': last_seen, ins_code: last_seen},
+        min_interval=0,
+        max_interval=0,
+    )
+    statements_method = Symbol.statements
+
+    async def symbol_statements(self, *args, **kwargs):
+        if self.ins_code == 'a':
+            raise ConnectionError
+        return await statements_method(self, *args, **kwargs)
+
+    monkeypatch.setattr(Symbol, 'statements', symbol_statements)
+    assert await watcher.poll() == [(ins_code, statements[0])]
+    assert [*watcher.errors] == ['a']
+    assert isinstance(watcher.errors['a'], ConnectionError)
+    assert watcher.last_seen['a'] == last_seen
+
+    monkeypatch.setattr(Symbol, 'statements', statements_method)
+    new = await watcher.poll()
+    assert new == [('a', statements[0])]
+    assert watcher.errors == {}
+
+
+def test_parse_statement_file():
+    df = parse_statement_file(TESTDATA / 'BS_Fmelli_1394.xls')
+    assert df.columns == [
+        'symbol',
+        'publishDate',
+        'financeYear',
+        'year',
+        'period',
+        'isAudit',
+        'item',
+        'value',
+        'file',
+    ]
+    assert df['year'].dtype == pl.Int32
+    row = df.filter(item='cash', period=3).row(0, named=True)
+    assert row['value'] == 3808412
+    assert row['publishDate'] == '1394/04/30'
+    # read from the checkbox of each row
+    assert df['isAudit'].dtype == pl.Boolean
+    assert set(df['isAudit']) == {True, False}
+    assert row['isAudit'] is False
+
+    # the price history export of fipiran
+    df = parse_statement_file(TESTDATA / 'ExportSymbolMadira.xls.html')
+    assert df['date'].dtype == pl.Date
+    assert {'jDate', 'symbol'} <= {*df.columns}
+
+
+def test_parse_statement_files():
+    lf = parse_statement_files(
+        [
+            TESTDATA / 'BS_Fmelli_1394.xls',
+            TESTDATA / 'IS_Fmelli_1394.xls',
+            TESTDATA / 'financial_ratios_fmelli_1394.xls',
+        ],
+        processes=2,
+    )
+    df = lf.collect()
+    assert df['file'].n_unique() == 3
+    assert {'NetIncome', 'ROE', 'TotalAssets'} <= {*df['item']}
+    assert df['value'].null_count() < df.height
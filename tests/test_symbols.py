@@ -6,6 +6,10 @@ from pytest_aiohutils import file
 from fipiran.symbols import (
     HistoryItem,
     Symbol,
+    SymbolSet,
+    adjust_history,
+    client_type_metrics,
+    client_types,
     index_compare,
     industries,
     search,
@@ -51,6 +55,33 @@ async def test_info():
     await fmelli.info()
 
 
+@file('symbol_info.json')
+async def test_info_struct():
+    info = await fmelli.info()
+    struct = await fmelli.info(struct=True)
+    assert not hasattr(struct, '__dict__')
+    assert struct.instrument.insCode == info.instrument.insCode
+    assert (
+        struct.instrumentTransaction.transactionDate
+        == info.instrumentTransaction.transactionDate
+    )
+    assert len(struct.instrument5BestLimits) == len(info.instrument5BestLimits)
+
+
+@file('symbol_info.json')
+async def test_client_types():
+    lf = client_type_metrics(await client_types([fmelli.ins_code]))
+    df = lf.collect()
+    assert df.height == 1
+    row = df.row(0, named=True)
+    assert row['insCode'] == fmelli.ins_code
+    assert row['individualNetVolume'] == 520731355 - 510986022
+    assert row['individualNetValue'] == row['individualNetVolume'] * 18720
+    assert row['individualPowerRatio'] == (520731355 / 12768) / (
+        510986022 / 6314
+    )
+
+
 @file('symbol_statistics.json')
 async def test_statistics():
     await fmelli.statistics(date=datetime.today())
@@ -77,6 +108,30 @@ async def test_history():
     assert not unexpected_cols
 
 
+@file('symbol_history.json')
+async def test_adjust_history():
+    lf = await fmelli.history()
+    # two symbols with the same data to check per insCode grouping
+    lf = pl.concat([lf, lf.with_columns(insCode=pl.lit('1'))])
+    for forward in (False, True):
+        df = adjust_history(lf, forward=forward).collect()
+        ends = df.group_by('insCode').agg(
+            pl.col('adjustmentFactor').first().alias('first'),
+            pl.col('adjustmentFactor').last().alias('last'),
+        )
+        assert (ends['first' if forward else 'last'] == 1.0).all()
+        # no downward gap remains between adjusted close and next
+        # priceYesterday
+        min_gap = df.select(
+            (
+                pl.col('priceYesterday')
+                / pl.col('closingPrice').shift(1).over('insCode')
+                - 1
+            ).min()
+        ).item()
+        assert min_gap > -1e-9
+
+
 @file('symbol_statements.json')
 async def test_statements():
     await fmelli.statements()
@@ -101,3 +156,16 @@ async def test_index_compare():
     lf = await index_compare()
     assert isinstance(lf, pl.LazyFrame)
     assert lf.select(pl.len()).collect().item() > 0
+
+
+@file('symbol_history.json')
+async def test_symbol_set():
+    symbols = SymbolSet([fmelli.ins_code, int(fmelli.ins_code)])
+    assert len(symbols) == 1
+    assert fmelli in symbols and fmelli.ins_code in symbols
+    assert [*symbols] == [fmelli]
+    assert {fmelli: 1}[Symbol(fmelli.ins_code)] == 1
+    lf = await symbols.histories()
+    assert SymbolSet.from_frame(lf) == symbols
+    assert symbols.filter(lf).collect().height == lf.collect().height
+    assert (SymbolSet() | symbols) - symbols == SymbolSet()
@@ -0,0 +1,42 @@
+import polars as pl
+from pytest_aiohutils import file
+
+from fipiran.symbols import industries, search
+from fipiran.text import normalize, normalize_strings
+
+
+def test_normalize():
+    s = pl.Series(
+        [
+            'بانك ملي',
+            '۱۲۳٤٥',
+            ' کربن\u200c  ایران\u200c ',
+            'می\u200c\u200cخواهم',
+            'سهـــام\u200f',
+            None,
+        ]
+    )
+    assert pl.select(normalize(pl.lit(s))).to_series().to_list() == [
+        'بانک ملی',
+        '12345',
+        'کربن ایران',
+        'می\u200cخواهم',
+        'سهام',
+        None,
+    ]
+
+
+@file('shcarbon_search.json')
+async def test_search_normalize():
+    instruments, _ = await search(symbol='کربن', normalize=True)
+    df = instruments.collect()
+    assert 'کربن ایران' in df['symbolFullName'].to_list()
+    assert not df['industryGroupCode'].str.ends_with(' ').any()
+
+
+@file('industries.json')
+async def test_industries_normalize():
+    lf = await industries(normalize=True)
+    assert lf.collect().equals(normalize_strings(await industries()).collect())
+    # the codes are padded, e.g. '44 '
+    assert not lf.collect()['industryGroupCode'].str.ends_with(' ').any()
@@ -0,0 +1,45 @@
+from datetime import date
+
+import polars as pl
+from pytest_aiohutils import file
+
+from fipiran.symbols import Symbol
+from fipiran.trading_calendar import TradingCalendar
+
+
+@file('symbol_history.json')
+async def test_gaps(tmp_path):
+    lf = await Symbol('35425587644337450').history()
+    calendar = TradingCalendar()
+    calendar.update(lf)
+    sessions = len(calendar.dates)
+    assert (
+        sessions
+        == lf.select(pl.col('transactionDate').n_unique()).collect().item()
+    )
+
+    path = tmp_path / 'calendar.parquet'
+    calendar.save(path)
+    calendar = TradingCalendar.load(path)
+    assert len(calendar.dates) == sessions
+
+    # remove two sessions of a second symbol
+    missing = calendar.dates[100:102].to_list()
+    other = lf.with_columns(insCode=pl.lit('1')).filter(
+        ~pl.col('transactionDate').dt.date().is_in(missing)
+    )
+    gaps = calendar.gaps(pl.concat([lf, other])).collect()
+    assert gaps.to_dicts() == [{'insCode': '1', 'date': d} for d in missing]
+
+
+def test_load_missing(tmp_path):
+    calendar = TradingCalendar.load(tmp_path / 'calendar.parquet')
+    assert len(calendar.dates) == 0
+    assert date(2025, 1, 1) not in calendar
+
+
+@file('index_compare.json')
+async def test_update_from_index_compare():
+    calendar = TradingCalendar()
+    await calendar.update_from_index_compare()
+    assert date(2025, 10, 1) in calendar